@@ -15,9 +15,12 @@ except importlib.metadata.PackageNotFoundError:
     __version__ = DEVELOPMENT_VERSION
 
 PACKAGE_DIR = os.path.dirname(__file__)
+HOME_DIR = os.path.expanduser("~")
+# Running using Pyinstaller
+IS_FROZEN = bool(getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"))
 
 if os.getenv("CMD_RUNNER_PORTABLE") == "1":
-    if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
+    if IS_FROZEN:
         # Running using Pyinstaller, so we take the dir where the executable is located
         # https://pyinstaller.org/en/stable/runtime-information.html#using-sys-executable-and-sys-argv-0
         APP_DIR = os.path.dirname(sys.argv[0])
@@ -11,6 +11,7 @@ import click
 
 import tray_runner.config
 from tray_runner.common_utils.common import run_command
+from tray_runner.constants import LOG_LEVEL_NAMES
 
 LOG = logging.getLogger(__name__)
 
@@ -97,7 +98,7 @@ class CliCmdRunnerApp:  # pylint: disable=too-few-public-methods
 
 @click.command()
 @click.option("--command", required=True, help="Command to execute.")
-@click.option("--log-level", type=click.Choice([logging.getLevelName(x) for x in [logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR, logging.CRITICAL]], case_sensitive=False), default=logging.getLevelName(logging.ERROR), show_default=True)
+@click.option("--log-level", type=click.Choice(LOG_LEVEL_NAMES, case_sensitive=False), default=logging.getLevelName(logging.ERROR), show_default=True)
 @click.version_option(tray_runner.__version__)
 def run(command: str, log_level: str) -> None:
     """
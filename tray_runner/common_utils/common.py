@@ -5,20 +5,31 @@ import locale
 import logging
 import os
 import shlex
+import shutil
 import subprocess
 import sys
-from datetime import datetime, tzinfo
+import tempfile
+from datetime import datetime, timezone, tzinfo
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import TYPE_CHECKING, BinaryIO, Dict, List, Optional, Tuple, Union
 
 import click
-import pytz
 from dateutil.tz import tzlocal
 from PySide6.QtCore import QThread
 from slugify import slugify
 
+if TYPE_CHECKING:
+    from babel import Locale
+
 LOG = logging.getLogger(__name__)
 
+# System time zone, created once; dateutil's tzlocal follows the DST rules of the system
+LOCAL_TZ = tzlocal()
+
+# Characters that make a command line depend on shell features (pipes, redirections, expansions, etc.)
+SHELL_METACHARACTERS = frozenset("|&;<>()$`*?[]#~{}\n")
+
 
 class CommandAborted(Exception):
     """
@@ -26,11 +37,27 @@ class CommandAborted(Exception):
     """
 
 
-def run_command(command: Union[str, List[str]], environ: Optional[Dict[str, str]] = None, run_in_shell: Optional[bool] = True, working_directory: Optional[str] = None, thread: Optional[QThread] = None, poll_period_ms: Optional[int] = None) -> Tuple[int, int, Optional[str], Optional[str]]:  # pylint: disable=too-many-arguments
+def read_output_tail(file_obj: BinaryIO, max_output_size: Optional[int] = None) -> str:
+    """
+    Reads the output of a command from a file, keeping only the last max_output_size bytes if set.
+    """
+    file_obj.seek(0, os.SEEK_END)
+    size = file_obj.tell()
+    if max_output_size is not None and size > max_output_size:
+        file_obj.seek(size - max_output_size)
+    else:
+        file_obj.seek(0)
+    output = file_obj.read().decode(locale.getpreferredencoding(False), errors="replace")
+    return output.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def run_command(command: Union[str, List[str]], environ: Optional[Dict[str, str]] = None, run_in_shell: Optional[bool] = True, working_directory: Optional[str] = None, thread: Optional[QThread] = None, poll_period_ms: Optional[int] = None, max_output_size: Optional[int] = None) -> Tuple[int, int, Optional[str], Optional[str]]:  # pylint: disable=too-many-arguments,too-many-locals
     """
     Runs a command using Powershell in Windows, or the current shell in Linux.
 
-    If stdout or stderr is returned by the command, it is stripped before being returned by this function.
+    The output is written to temporary files instead of pipes, so only the last max_output_size bytes of stdout
+    and stderr (all of them if not set) are kept in memory. If stdout or stderr is returned by the command, it is
+    stripped before being returned by this function.
     """
     if poll_period_ms is None:
         poll_period_ms = 500
@@ -53,43 +80,105 @@ def run_command(command: Union[str, List[str]], environ: Optional[Dict[str, str]
     if environ:
         new_env = {**new_env, **environ}
 
-    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, env=new_env, cwd=working_directory, shell=run_in_shell) as process:
-        LOG.debug("Waiting for command %s to finish...", command)
-        while True:
-            if thread and thread.isInterruptionRequested():
-                LOG.info("Command %s, stop signal detected; killing command and raising CommandAborted exception.", command)
-                process.kill()
-                raise CommandAborted()
-            try:
-                stdout, stderr = process.communicate(timeout=poll_period_ms / 1000)
-                break
-            except subprocess.TimeoutExpired:
-                continue
+    with tempfile.TemporaryFile() as stdout_file, tempfile.TemporaryFile() as stderr_file:
+        with subprocess.Popen(cmd, stdout=stdout_file, stderr=stderr_file, env=new_env, cwd=working_directory, shell=run_in_shell) as process:
+            LOG.debug("Waiting for command %s to finish...", command)
+            while True:
+                if thread and thread.isInterruptionRequested():
+                    LOG.info("Command %s, stop signal detected; killing command and raising CommandAborted exception.", command)
+                    process.kill()
+                    raise CommandAborted()
+                try:
+                    process.wait(timeout=poll_period_ms / 1000)
+                    break
+                except subprocess.TimeoutExpired:
+                    continue
+
+            pid = process.pid
+            exit_code = process.returncode
+
+        stdout = read_output_tail(stdout_file, max_output_size).strip()
+        stderr = read_output_tail(stderr_file, max_output_size).strip()
+        return pid, exit_code, stdout if stdout else None, stderr if stderr else None
+
+
+def split_simple_command(command: str, path: Optional[str] = None, working_directory: Optional[str] = None) -> Optional[List[str]]:
+    """
+    Splits a command line into a list of arguments if it doesn't need any shell feature to run.
+
+    The executable is looked up as the command will be run: in path (the PATH of the command environment) or, if it contains a
+    directory, relative to working_directory.
+
+    Returns None if the command uses shell metacharacters, the executable can't be found, or the
+    platform is Windows (where the shell also resolves built-in commands), so the caller must keep using the shell.
+    """
+    if sys.platform == "win32":
+        return None
+    if any(char in SHELL_METACHARACTERS for char in command):
+        return None
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+    if not argv:
+        return None
+    if os.sep in argv[0]:
+        executable = os.path.join(working_directory or os.getcwd(), argv[0])
+        if not os.path.isfile(executable) or not os.access(executable, os.X_OK):
+            return None
+    elif not shutil.which(argv[0], path=path):
+        return None
+    return argv
+
+
+def get_app_menu_shortcut_path(name: str, autostart: Optional[bool] = False) -> Optional[str]:
+    """
+    Returns the path of the shortcut to launch the application in the applications' menu, or None if the platform is not supported.
+
+    Support for Windows and Linux.
+    """
+    if sys.platform == "win32":
+        import winshell  # pylint: disable=import-error,import-outside-toplevel
+
+        if autostart:
+            return str(Path(winshell.startup(common=False)) / f"{name}.lnk")
+        return str(Path(winshell.programs(common=False)) / f"{name}.lnk")
+
+    if sys.platform == "linux":
+        if autostart:
+            app_dir = os.path.expanduser("~/.config/autostart")
+        else:
+            app_dir = os.path.expanduser("~/.local/share/applications")
+        return os.path.join(app_dir, f"{slugify(name)}.desktop")
 
-        pid = process.pid
-        exit_code = process.returncode
-        return pid, exit_code, stdout.strip() if stdout.strip() else None, stderr.strip() if stderr.strip() else None
+    # Platform not supported
+    LOG.error("Error getting shortcut path: platform not supported (%s).", sys.platform)
+    return None
 
 
-def create_app_menu_shortcut(name: str, command: str, args: Optional[str] = None, work_dir: Optional[str] = None, description: Optional[str] = None, icon: Optional[Union[str, Tuple[str, int]]] = None, autostart: Optional[bool] = False) -> None:  # pylint: disable=too-many-branches,too-many-arguments
+def create_app_menu_shortcut(name: str, command: str, args: Optional[str] = None, work_dir: Optional[str] = None, description: Optional[str] = None, icon: Optional[Union[str, Tuple[str, int]]] = None, autostart: Optional[bool] = False) -> bool:  # pylint: disable=too-many-branches,too-many-arguments
     """
     Creates a shortcut to launch the application in the applications' menu.
 
-    Support for Windows and Linux.
+    Support for Windows and Linux. Returns whether the shortcut has been created.
     """
 
     LOG.debug("Creating desktop shortcut with params: platform=%s, name=%s, command=%s, work_dir=%s, description=%s, icon=%s, autostart=%s...", sys.platform, name, command, work_dir, description, icon, autostart)
+    try:
+        shortcut_path = get_app_menu_shortcut_path(name, autostart)
+    except Exception as ex:  # pylint: disable=broad-except
+        LOG.error("Error getting shortcut path: %s", str(ex), exc_info=True)
+        return False
+    if shortcut_path is None:
+        return False
+
+    LOG.debug("Creating shortcut in %s...", shortcut_path)
     if sys.platform == "win32":
 
         try:
             import winshell  # pylint: disable=import-error,import-outside-toplevel
 
-            if autostart:
-                link_filepath = str(Path(winshell.startup(common=False)) / f"{name}.lnk")
-            else:
-                link_filepath = str(Path(winshell.programs(common=False)) / f"{name}.lnk")
-            LOG.debug("Creating shortcut in %s...", link_filepath)
-            with winshell.shortcut(link_filepath) as link:
+            with winshell.shortcut(shortcut_path) as link:
                 link.path = command
                 if description:
                     link.description = description
@@ -101,38 +190,27 @@ def create_app_menu_shortcut(name: str, command: str, args: Optional[str] = None
                     link.icon_location = (icon[0], icon[1])
                 elif icon and isinstance(icon, str):
                     link.icon_location = (icon, 0)
+            return True
         except Exception as ex:  # pylint: disable=broad-except
             LOG.error("Error creating Windows Start Menu shortcut: %s", str(ex), exc_info=True)
-
-    elif sys.platform == "linux":
-
-        if autostart:
-            app_dir = os.path.expanduser("~/.config/autostart")
+            return False
+
+    os.makedirs(os.path.dirname(shortcut_path), exist_ok=True)
+    with click.open_file(shortcut_path, "w") as shortcut:
+        shortcut.write("[Desktop Entry]\n")
+        shortcut.write("Version=1.0\n")
+        shortcut.write("Type=Application\n")
+        shortcut.write("Terminal=False\n")
+        shortcut.write(f"Name={name}\n")
+        if args:
+            shortcut.write(f"Exec={command} {args}\n")
         else:
-            app_dir = os.path.expanduser("~/.local/share/applications")
-        if not os.path.exists(app_dir):
-            os.makedirs(app_dir)
-        app_shortcut = os.path.join(app_dir, f"{slugify(name)}.desktop")
-        LOG.debug("Creating shortcut in %s...", app_shortcut)
-        with click.open_file(app_shortcut, "w") as shortcut:
-            shortcut.write("[Desktop Entry]\n")
-            shortcut.write("Version=1.0\n")
-            shortcut.write("Type=Application\n")
-            shortcut.write("Terminal=False\n")
-            shortcut.write(f"Name={name}\n")
-            if args:
-                shortcut.write(f"Exec={command} {args}\n")
-            else:
-                shortcut.write(f"Exec={command}\n")
-            if description:
-                shortcut.write(f"Comment={description}\n")
-            if icon and isinstance(icon, str):
-                shortcut.write(f"Icon={icon}\n")
-
-    else:
-
-        # Platform not supported
-        LOG.error("Error creating shortcut: platform not supported (%s).", sys.platform)
+            shortcut.write(f"Exec={command}\n")
+        if description:
+            shortcut.write(f"Comment={description}\n")
+        if icon and isinstance(icon, str):
+            shortcut.write(f"Icon={icon}\n")
+    return True
 
 
 def remove_app_menu_shortcut(name: str, autostart: Optional[bool] = False) -> None:
@@ -141,34 +219,12 @@ def remove_app_menu_shortcut(name: str, autostart: Optional[bool] = False) -> No
 
     Support for Windows and Linux.
     """
-    if sys.platform == "win32":
-
-        try:
-            import winshell  # pylint: disable=import-error,import-outside-toplevel
-
-            if autostart:
-                link_filepath = str(Path(winshell.startup(common=False)) / f"{name}.lnk")
-            else:
-                link_filepath = str(Path(winshell.programs(common=False)) / f"{name}.lnk")
-            if os.path.exists(link_filepath):
-                os.remove(link_filepath)
-        except Exception as ex:  # pylint: disable=broad-except
-            LOG.error("Error creating Windows Start Menu shortcut: %s", str(ex), exc_info=True)
-
-    elif sys.platform == "linux":
-
-        if autostart:
-            app_dir = os.path.expanduser("~/.config/autostart")
-        else:
-            app_dir = os.path.expanduser("~/.local/share/applications")
-        app_shortcut = os.path.join(app_dir, f"{slugify(name)}.desktop")
-        if os.path.exists(app_shortcut):
-            os.remove(app_shortcut)
-
-    else:
-
-        # Platform not supported
-        LOG.error("Error removing shortcut: platform not supported (%s).", sys.platform)
+    try:
+        shortcut_path = get_app_menu_shortcut_path(name, autostart)
+        if shortcut_path and os.path.exists(shortcut_path):
+            os.remove(shortcut_path)
+    except Exception as ex:  # pylint: disable=broad-except
+        LOG.error("Error removing shortcut: %s", str(ex), exc_info=True)
 
 
 def coalesce(*arg):
@@ -188,18 +244,28 @@ def get_simple_default_locale() -> str:
     return "en_US"
 
 
+@lru_cache(maxsize=1)
+def get_default_babel_locale() -> "Locale":
+    """
+    Returns the Babel locale for the default locale, parsed only once as it doesn't change while the application runs.
+    """
+    from babel import Locale  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+    return Locale.parse(get_simple_default_locale())
+
+
 def get_local_datetime() -> datetime:
     """
     Returns a datetime object with the current system tzinfo set.
     """
-    return datetime.now().replace(tzinfo=tzlocal())
+    return datetime.now().replace(tzinfo=LOCAL_TZ)
 
 
 def get_utc_datetime() -> datetime:
     """
     Returns a datetime object with the UTC tzinfo set.
     """
-    return datetime.utcnow().replace(tzinfo=pytz.UTC)
+    return datetime.now(timezone.utc)
 
 
 def ensure_local_datetime(date_time: datetime, default_tz: Optional[tzinfo] = None):
@@ -212,5 +278,5 @@ def ensure_local_datetime(date_time: datetime, default_tz: Optional[tzinfo] = No
         if default_tz:
             date_time = date_time.replace(tzinfo=default_tz)
         else:
-            date_time = date_time.replace(tzinfo=pytz.UTC)
-    return date_time.astimezone(tzlocal())
+            date_time = date_time.replace(tzinfo=timezone.utc)
+    return date_time.astimezone(LOCAL_TZ)
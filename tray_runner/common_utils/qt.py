@@ -6,7 +6,9 @@ Borrowed and modified from https://gist.github.com/cpbotha/1b42a20c8f3eb9bb7cb8
 import logging
 from typing import Dict, Optional, Type, Union
 
-from PySide6.QtCore import QMetaObject, Qt
+import click
+from PySide6.QtCore import QMetaObject, Qt, QThreadPool
+from PySide6.QtGui import QIcon
 from PySide6.QtUiTools import QUiLoader
 from PySide6.QtWidgets import QWidget
 
@@ -109,6 +111,20 @@ def load_ui(ui_file, base_instance: Optional[QWidget] = None, custom_widgets: Op
     return widget
 
 
+ICON_CACHE: Dict[str, QIcon] = {}
+
+
+def get_icon(path: str) -> QIcon:
+    """
+    Returns the icon for the file path, loading it only the first time it is requested.
+    """
+    icon = ICON_CACHE.get(path)
+    if icon is None:
+        icon = QIcon(path)
+        ICON_CACHE[path] = icon
+    return icon
+
+
 def checkbox_tristate_from_val(val: Optional[bool]) -> Qt.CheckState:
     """
     Converts an optional boolean value to a CheckState.
@@ -146,3 +162,10 @@ def set_warning_style(widget: QWidget, level: int) -> None:
         widget.setStyleSheet(base_style_sheet.format(bg="#d68e99", fg="black"))
     elif level == logging.CRITICAL:
         widget.setStyleSheet(base_style_sheet.format(bg="#d68e99", fg="black"))
+
+
+def launch_in_background(url: str) -> None:
+    """
+    Opens a file or URL with the default application, from a pooled thread, as it may block for a while (network drives, application start, etc.).
+    """
+    QThreadPool.globalInstance().start(lambda: click.launch(url))
@@ -4,19 +4,19 @@ tray_runner.config module.
 import json
 import logging
 import os
+import threading
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from enum import Enum
 from gettext import gettext
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import click
-import pytz
 from croniter import croniter
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from slugify import slugify
 
-from tray_runner import APP_DIR, DEFAULT_CONFIG_FILE
+from tray_runner import APP_DIR, DEFAULT_CONFIG_FILE, HOME_DIR
 from tray_runner.common_utils.common import ensure_local_datetime
 
 LOG = logging.getLogger(__name__)
@@ -84,7 +84,7 @@ class ConfigCommand(BaseModel):
     command: Optional[str] = Field()
     script: Optional[str] = Field()
     run_script_powershell: bool = Field(default=False)
-    working_directory: str = Field(default=os.path.expanduser("~"))
+    working_directory: str = Field(default=HOME_DIR)
     environment: List[ConfigCommandEnvironmentVariable] = Field(default=[])
     description: Optional[str]
     disabled: bool = Field(default=False)
@@ -121,6 +121,10 @@ class ConfigCommand(BaseModel):
     max_duration: Optional[float]
     avg_duration: Optional[float]
 
+    _logs: Optional[ConfigCommandLog] = PrivateAttr(default=None)
+    _logs_path: Optional[str] = PrivateAttr(default=None)
+    _logs_stat: Optional[Tuple[float, int]] = PrivateAttr(default=None)
+
     def get_next_execution_dt(self, start_date: Optional[datetime] = None) -> Optional[datetime]:
         """
         Get the command's next execution date/time, according to its status and run mode.
@@ -144,10 +148,10 @@ class ConfigCommand(BaseModel):
             if self.cron_expr:
                 if start_date is None:
                     start_date = now
-                next_dt = croniter(self.cron_expr).get_next(ret_type=datetime, start_time=ensure_local_datetime(start_date)).astimezone(pytz.UTC).replace(tzinfo=None)
+                next_dt = croniter(self.cron_expr).get_next(ret_type=datetime, start_time=ensure_local_datetime(start_date)).astimezone(timezone.utc).replace(tzinfo=None)
                 while next_dt < now:
                     # Find a moment in the future
-                    next_dt = croniter(self.cron_expr).get_next(ret_type=datetime, start_time=ensure_local_datetime(next_dt)).astimezone(pytz.UTC).replace(tzinfo=None)
+                    next_dt = croniter(self.cron_expr).get_next(ret_type=datetime, start_time=ensure_local_datetime(next_dt)).astimezone(timezone.utc).replace(tzinfo=None)
                 return next_dt
             raise Exception(f"Command run mode is {self.run_mode.value}, but no cron_expr set.")
         raise Exception(f"Invalid run mode: {self.run_mode}.")
@@ -168,46 +172,69 @@ class ConfigCommand(BaseModel):
         """
         return os.path.join(APP_DIR, "logs", f"{slugify(self.id)}.log.json")
 
+    @staticmethod
+    def _get_log_file_stat(log_file_path: str) -> Optional[Tuple[float, int]]:
+        """
+        Returns the modification time and size of the log file, or None if it can't be read.
+        """
+        try:
+            stat_result = os.stat(log_file_path)
+        except OSError:
+            return None
+        return stat_result.st_mtime, stat_result.st_size
+
     def add_log(self, item: ConfigCommandLogItem):
         """
         Add a log to the log history of the command.
+
+        The history is kept in memory and only read again from the log file when its modification time or size change.
         """
 
-        # List of current logs, empty if no log file exists yet
-        logs = ConfigCommandLog()
+        log_file_path = self.get_log_file_path()
 
-        # Read current logs
-        if os.path.exists(self.get_log_file_path()):
-            try:
-                with click.open_file(self.get_log_file_path(), "r") as file_obj:
-                    json_object = json.load(file_obj)
-                    if json_object:
-                        logs = ConfigCommandLog(**json_object)
-            except Exception as ex:  # pylint: disable=broad-except
-                backup_file = self.get_log_file_path() + "-" + str(uuid.uuid4())
-                LOG.error("Failed to load logs file %s: %s; backing up the file to %s...", self.get_log_file_path(), str(ex), backup_file, exc_info=True)
-                try:
-                    os.rename(self.get_log_file_path(), backup_file)
-                except Exception as move_ex:  # pylint: disable=broad-except
-                    LOG.error("Failed to move file %s to %s: %s; expect an abnormal behaviour.", self.get_log_file_path(), backup_file, str(move_ex), exc_info=True)
+        if self._logs is None or self._logs_path != log_file_path or self._logs_stat != self._get_log_file_stat(log_file_path):
 
-        # Create the folder where the logs will be stored, if it doesn't exist yet
-        if not os.path.exists(os.path.dirname(self.get_log_file_path())):
-            os.makedirs(os.path.dirname(self.get_log_file_path()))
+            # List of current logs, empty if no log file exists yet
+            logs = ConfigCommandLog()
+
+            # Read current logs
+            if os.path.exists(log_file_path):
+                try:
+                    with click.open_file(log_file_path, "r") as file_obj:
+                        json_object = json.load(file_obj)
+                        if json_object:
+                            logs = ConfigCommandLog(**json_object)
+                except Exception as ex:  # pylint: disable=broad-except
+                    backup_file = log_file_path + "-" + str(uuid.uuid4())
+                    LOG.error("Failed to load logs file %s: %s; backing up the file to %s...", log_file_path, str(ex), backup_file, exc_info=True)
+                    try:
+                        os.rename(log_file_path, backup_file)
+                    except Exception as move_ex:  # pylint: disable=broad-except
+                        LOG.error("Failed to move file %s to %s: %s; expect an abnormal behaviour.", log_file_path, backup_file, str(move_ex), exc_info=True)
+
+            # Create the folder where the logs will be stored, if it doesn't exist yet
+            if not os.path.exists(os.path.dirname(log_file_path)):
+                os.makedirs(os.path.dirname(log_file_path))
+
+            self._logs = logs
+            self._logs_path = log_file_path
+
+        logs = self._logs
 
         # Add the current log message
         logs.items.append(item)
 
         # Keep only the latest N messages
         if len(logs.items) > self.max_log_count:
-            logs.items = logs.items[-self.max_log_count :]
+            del logs.items[: -self.max_log_count]
 
         # Save the logs
-        with click.open_file(self.get_log_file_path(), "w", atomic=True) as file_obj:
+        with click.open_file(log_file_path, "w", atomic=True) as file_obj:
             try:
                 file_obj.write(logs.json(exclude_defaults=True, exclude_none=True, indent=2))
             except Exception as ex:  # pylint: disable=broad-except
-                LOG.error("Error saving logs for command in file %s: %s.", self.get_log_file_path(), str(ex), exc_info=True)
+                LOG.error("Error saving logs for command in file %s: %s.", log_file_path, str(ex), exc_info=True)
+        self._logs_stat = self._get_log_file_stat(log_file_path)
 
 
 class LogLevelEnum(str, Enum):
@@ -255,23 +282,64 @@ class Config(BaseModel):
 
     app_runs: int = Field(default=0)
 
+    _commands_by_id: Dict[str, ConfigCommand] = PrivateAttr(default_factory=dict)
+    _commands_by_slug: Dict[str, ConfigCommand] = PrivateAttr(default_factory=dict)
+    _commands_by_name: Dict[str, ConfigCommand] = PrivateAttr(default_factory=dict)
+    _commands_by_lower_name: Dict[str, List[ConfigCommand]] = PrivateAttr(default_factory=dict)
+    _saved_json: Optional[bytes] = PrivateAttr(default=None)
+    _saved_path: Optional[str] = PrivateAttr(default=None)
+    _sorted_commands: Optional[List[ConfigCommand]] = PrivateAttr(default=None)
+    _save_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        self.rebuild_index()
+
+    def rebuild_index(self):
+        """
+        Rebuilds the indexes of commands by id and name; it must be called after adding, removing or renaming commands.
+        """
+        # Reversed, so the first command wins if there are duplicated ids or names
+        self._commands_by_id = {command.id: command for command in reversed(self.commands)}
+        self._commands_by_slug = {slugify(command.id): command for command in reversed(self.commands)}
+        self._commands_by_name = {command.name: command for command in reversed(self.commands)}
+        # All the commands are kept for each lowercased name, so duplicates that differ only in case are still found
+        self._commands_by_lower_name = {}
+        for command in self.commands:
+            self._commands_by_lower_name.setdefault(command.name.lower(), []).append(command)
+        self._sorted_commands = None
+
+    def get_sorted_commands(self) -> List[ConfigCommand]:
+        """
+        Returns the commands sorted by name (case insensitive); the list is cached until the index is rebuilt.
+        """
+        if self._sorted_commands is None:
+            self._sorted_commands = sorted(self.commands, key=lambda x: x.name.lower())
+        return self._sorted_commands
+
     def get_command_by_name(self, command_name: str) -> Optional[ConfigCommand]:
         """
         Finds a command in the configuration by its name.
         """
-        for command in self.commands:
-            if command.name == command_name:
-                return command
-        return None
+        return self._commands_by_name.get(command_name)
 
     def get_command_by_id(self, command_id: str) -> Optional[ConfigCommand]:
         """
         Finds a command in the configuration by its id.
         """
-        for command in self.commands:
-            if command.id == command_id:
-                return command
-        return None
+        return self._commands_by_id.get(command_id)
+
+    def get_command_by_slug(self, slug: str) -> Optional[ConfigCommand]:
+        """
+        Finds a command in the configuration whose id has the slug specified (the ids are slugified to build the log file names).
+        """
+        return self._commands_by_slug.get(slug)
+
+    def get_commands_by_name_ignore_case(self, command_name: str) -> List[ConfigCommand]:
+        """
+        Finds the commands in the configuration with the name, ignoring the case.
+        """
+        return self._commands_by_lower_name.get(command_name.lower(), [])
 
     def save_to_file(self, file_path: Optional[str] = None):
         """
@@ -281,8 +349,18 @@ class Config(BaseModel):
         if not os.path.exists(os.path.dirname(config_file)):
             os.makedirs(os.path.dirname(config_file))
         try:
-            with click.open_file(config_file, mode="w", atomic=True) as file_obj:
-                file_obj.write(self.json(exclude_defaults=True, exclude_none=True, indent=2))
+            with self._save_lock:
+                json_data = self.json(exclude_defaults=True, exclude_none=True, indent=2).encode("utf-8")
+                if json_data == self._saved_json and config_file == self._saved_path and os.path.exists(config_file):
+                    # Nothing has changed since the last save to this file
+                    return
+                # Written to a temporary file that replaces the configuration file when closed; synced before, so a crash never leaves a truncated file
+                with click.open_file(config_file, mode="wb", atomic=True) as file_obj:
+                    file_obj.write(json_data)
+                    file_obj.flush()
+                    os.fsync(file_obj.fileno())
+                self._saved_json = json_data
+                self._saved_path = config_file
         except Exception as ex:  # pylint: disable=broad-except
             LOG.error("Error saving configuration file %s: %s.", file_path or DEFAULT_CONFIG_FILE, str(ex), exc_info=True)
 
@@ -300,7 +378,7 @@ class Config(BaseModel):
             raise Exception(f"Configuration file {file_path} is not a file.")
 
         try:
-            with click.open_file(file_path) as file_obj:
+            with click.open_file(file_path, encoding="utf-8") as file_obj:
                 json_object = json.load(file_obj)
                 if json_object:
                     return Config(**json_object)
@@ -5,3 +5,4 @@ APP_ID = "tray_runner"
 APP_NAME = "Tray Runner"
 APP_URL = "https://github.com/okelet/tray-runner"
 DEVELOPMENT_VERSION = "__DEVELOPMENT__"
+LOG_LEVEL_NAMES = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
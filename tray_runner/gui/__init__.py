@@ -1,37 +1,70 @@
 """
 tray_runner.gui module
 """
+import contextlib
+import heapq
 import itertools
+import locale
 import logging
 import os.path
+import queue
 import signal
+import socket
 import stat
 import sys
 import tempfile
+import threading
 import time
-import webbrowser
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from functools import partial
 from gettext import gettext
-from logging.handlers import RotatingFileHandler
-from typing import List, Optional
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 import click
-from PySide6.QtCore import QLockFile, QThread, QTimer, Signal
-from PySide6.QtGui import QIcon
+from PySide6.QtCore import QLockFile, QObject, QSocketNotifier, QThread, QTimer, Signal
+from PySide6.QtGui import QAction
 from PySide6.QtWidgets import QApplication, QMainWindow, QMenu, QMessageBox, QSystemTrayIcon
+from slugify import slugify
 
 import tray_runner
-from tray_runner import DEFAULT_CONFIG_FILE, __version__
-from tray_runner.common_utils.common import CommandAborted, coalesce, remove_app_menu_shortcut, run_command
+from tray_runner import DEFAULT_CONFIG_FILE, HOME_DIR, __version__
+from tray_runner.common_utils.common import CommandAborted, coalesce, run_command, split_simple_command
+from tray_runner.common_utils.qt import get_icon, launch_in_background
 from tray_runner.config import Config, ConfigCommand, ConfigCommandLogItem, ConfigCommandRunMode
-from tray_runner.constants import APP_ID, APP_NAME, APP_URL, DEVELOPMENT_VERSION
-from tray_runner.gui.constants import ABOUT_ICON_PATH, CIRCLE_ICON_PATH, COMMAND_ERROR_ICON_PATH, COMMAND_OK_ICON_PATH, EXIT_ICON_PATH, ICON_PATH, REGULAR_ICON_PATH, SETTINGS_ICON_PATH, WARNING_ICON_PATH
-from tray_runner.gui.settings_dialog import SettingsDialog
-from tray_runner.utils import PackagePathFilter, create_tray_runner_app_menu_launcher, create_tray_runner_autostart_shortcut
+from tray_runner.constants import APP_ID, APP_NAME, APP_URL, DEVELOPMENT_VERSION, LOG_LEVEL_NAMES
+from tray_runner.gui.constants import ABOUT_ICON_PATH, COMMAND_ERROR_ICON_PATH, COMMAND_OK_ICON_PATH, EXIT_ICON_PATH, ICON_PATH, REGULAR_ICON_PATH, SETTINGS_ICON_PATH, WARNING_ICON_PATH
+from tray_runner.utils import PackagePathFilter, create_tray_runner_app_menu_launcher, create_tray_runner_autostart_shortcut, remove_tray_runner_app_menu_launcher, remove_tray_runner_autostart_shortcut
+
+if TYPE_CHECKING:
+    from tray_runner.gui.settings_dialog import SettingsDialog
 
 LOG = logging.getLogger(__name__)
 
+# Directory of the files with the scripts of the commands, named after the command id, so they are overwritten in each start of the application
+SCRIPTS_DIR = os.path.join(tray_runner.APP_DIR, "scripts")
+# Maximum time the scheduler timer waits, to recover from wall clock changes (suspend, NTP adjustments, etc.)
+MAX_SCHEDULER_WAIT_SECONDS = 60
+# Time to wait before writing the configuration, so several changes in a short period are saved only once
+SAVE_CONFIG_DELAY_MS = 500
+# Time to wait before writing the statistics of the command runs, so frequent commands don't rewrite the configuration on each run
+SAVE_STATS_DELAY_MS = 30000
+# Commands due in less than this time are run right away, instead of sleeping again for a period shorter than the OS timer resolution
+SCHEDULER_TOLERANCE_SECONDS = 0.02
+# Maximum size of the output (the last bytes) of a command that is kept for the logs and notifications
+MAX_OUTPUT_SIZE = 64 * 1024
+# Time to wait for the single instance lock, so an instance that is closing can release it
+LOCK_FILE_WAIT_MS = 250
+
+# Notification templates, translated once as the language doesn't change while the application is running
+COMMAND_FAILED_MESSAGE = gettext("Command failed to run ({error_message}).")
+COMMAND_FAILED_RESTART_MESSAGE = gettext("Command failed to run ({error_message}); restarting after {seconds_between_executions} seconds...")
+COMMAND_EXITED_MESSAGE = gettext("Command exited with code {exit_code} (took {elapsed_time:.2f} seconds).")
+COMMAND_EXITED_RESTART_MESSAGE = gettext("Command exited with code {exit_code} (took {elapsed_time:.2f} seconds); restarting after {seconds_between_executions} seconds...")
+COMMAND_STDOUT_MESSAGE = gettext("Standard output: {stdout}")
+COMMAND_STDERR_MESSAGE = gettext("Error output: {stderr}")
+
 
 class CommandThreadAbortedException(Exception):
     """
@@ -39,248 +72,428 @@ class CommandThreadAbortedException(Exception):
     """
 
 
+def format_command_notification(exit_code: Optional[int], elapsed_time: Optional[float], error_message: Optional[str], stdout: Optional[str], stderr: Optional[str], include_output: bool, restart_after: Optional[int]) -> str:  # pylint: disable=too-many-arguments
+    """
+    Builds the message of the notification shown when a command finishes.
+
+    If restart_after is set, the message tells that the command will be restarted after that number of seconds.
+    """
+    if exit_code is None:
+        if restart_after is None:
+            return COMMAND_FAILED_MESSAGE.format(error_message=error_message)
+        return COMMAND_FAILED_RESTART_MESSAGE.format(error_message=error_message, seconds_between_executions=restart_after)
+    if restart_after is None:
+        parts = [COMMAND_EXITED_MESSAGE.format(exit_code=exit_code, elapsed_time=elapsed_time)]
+    else:
+        parts = [COMMAND_EXITED_RESTART_MESSAGE.format(exit_code=exit_code, elapsed_time=elapsed_time, seconds_between_executions=restart_after)]
+    if include_output and stdout:
+        parts.append(COMMAND_STDOUT_MESSAGE.format(stdout=stdout))
+    if include_output and stderr:
+        parts.append(COMMAND_STDERR_MESSAGE.format(stderr=stderr))
+    return "\n\n".join(parts)
+
+
+def get_command_icon_path(command: ConfigCommand) -> str:
+    """
+    Returns the path of the icon that represents the result of the last execution of the command.
+    """
+    if command.last_run_error_message or command.last_run_exit_code:
+        return COMMAND_ERROR_ICON_PATH
+    return COMMAND_OK_ICON_PATH
+
+
+class CommandScheduler(QObject):
+    """
+    CommandScheduler class.
+
+    Keeps a queue of the commands ordered by their next execution date/time, using a single timer in the main thread to start them when they are due.
+    """
+
+    wakeup_signal = Signal()
+
+    def __init__(self) -> None:
+        QObject.__init__(self)
+        self._heap: List[Tuple[datetime, int, "CommandThread"]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.tick)  # type: ignore[attr-defined]
+        # Queued when emitted from the command threads, so the timer is always handled in the main thread
+        self.wakeup_signal.connect(self.tick)  # type: ignore[attr-defined]
+
+    def schedule(self, command_thread: "CommandThread", run_dt: Optional[datetime]) -> None:
+        """
+        Schedules the command thread to run at run_dt, replacing any previous schedule for it.
+        """
+        with self._lock:
+            if not command_thread.active or run_dt is None:
+                return
+            seq = next(self._seq)
+            command_thread.schedule_seq = seq
+            heapq.heappush(self._heap, (run_dt, seq, command_thread))
+        self.wakeup_signal.emit()
+
+    def unschedule(self, command_thread: "CommandThread") -> None:
+        """
+        Removes the command thread from the schedule, so it won't be run again.
+        """
+        with self._lock:
+            command_thread.active = False
+            command_thread.schedule_seq = None
+
+    def start(self) -> None:
+        """
+        Starts processing the queue of commands.
+        """
+        self._stopped = False
+        self.tick()
+
+    def stop(self) -> None:
+        """
+        Stops processing the queue of commands.
+        """
+        self._stopped = True
+        self._timer.stop()
+
+    def tick(self) -> None:
+        """
+        Starts the command threads that are due, and sets the timer to the next one.
+        """
+        if self._stopped:
+            return
+        due_threads: List[Tuple[datetime, "CommandThread"]] = []
+        timeout: Optional[float] = None
+        with self._lock:
+            now = datetime.utcnow()
+            while self._heap:
+                run_dt, seq, command_thread = self._heap[0]
+                if command_thread.schedule_seq != seq:
+                    # Stale entry, the command has been rescheduled or removed
+                    heapq.heappop(self._heap)
+                    continue
+                wait = (run_dt - now).total_seconds()
+                if wait > SCHEDULER_TOLERANCE_SECONDS:
+                    timeout = min(wait, MAX_SCHEDULER_WAIT_SECONDS)
+                    break
+                heapq.heappop(self._heap)
+                command_thread.schedule_seq = None
+                due_threads.append((run_dt, command_thread))
+        for run_dt, command_thread in due_threads:
+            if command_thread.isRunning():
+                # Run it again when the current execution finishes, so the schedule is not lost
+                LOG.debug("Command %s - %s is still running; it will run again when the current execution finishes.", command_thread.command.name, command_thread.command.command)
+                if command_thread.pending_run_dt is None or run_dt < command_thread.pending_run_dt:
+                    command_thread.pending_run_dt = run_dt
+                continue
+            LOG.info("Command %s - %s: running command because the next_run_dt has come (%s).", command_thread.command.name, command_thread.command.command, run_dt)
+            command_thread.start()
+        if timeout is None:
+            self._timer.stop()
+        else:
+            self._timer.start(int(timeout * 1000))
+
+
+@dataclass(frozen=True)
+class ResolvedCommandSettings:
+    """
+    Settings of a command after applying the global defaults to the options not set in the command.
+    """
+
+    include_output_in_notifications: bool
+    show_complete_notifications: bool
+    show_error_notifications: bool
+    run_in_shell: bool
+    restart_on_failure: bool
+    restart_on_exit: bool
+    working_directory: str
+    environment: Dict[str, str]
+
+
 class CommandThread(QThread):  # pylint: disable=too-few-public-methods
     """
     CommandThread class.
 
-    Thread responsible for running the commands defined in the configuration and emitting signals on change.
+    Thread responsible for running a command each time the scheduler finds it is due, and emitting signals on change.
     """
 
     notification_signal = Signal(str, str)
-    update_menu_signal = Signal()
+    update_menu_signal = Signal(object)
+    save_stats_signal = Signal()
 
-    def __init__(self, app: "TrayCmdRunnerApp", command: ConfigCommand, is_startup: Optional[bool] = False) -> None:
+    def __init__(self, app: "TrayCmdRunnerApp", command: ConfigCommand) -> None:
         QThread.__init__(self)
         self.app = app
         self.command = command
-        self.is_startup = is_startup
-        self.force_run = False
-        self.update_menu_signal.connect(self.app.update_status)  # type: ignore[attr-defined]
+        self.active = True
+        self.schedule_seq: Optional[int] = None
+        # Execution that was due while the command was running
+        self.pending_run_dt: Optional[datetime] = None
+        self._settings: Optional[ResolvedCommandSettings] = None
+        # Arguments to run the command without shell, resolved for the settings they were computed with
+        self._simple_argv: Optional[Tuple[ResolvedCommandSettings, str, Optional[List[str]]]] = None
+        self._script_key: Optional[Tuple[int, bool]] = None
+        self._script_path: Optional[str] = None
+        self.update_menu_signal.connect(self.app.update_command_status)  # type: ignore[attr-defined]
         self.notification_signal.connect(self.app.show_notification)  # type: ignore[attr-defined]
+        self.save_stats_signal.connect(self.app.save_stats)  # type: ignore[attr-defined]
+        # Handled in the main thread, once the thread is no longer running
+        self.finished.connect(self.run_pending)  # type: ignore[attr-defined]
 
-    def run(self):  # pylint: disable=too-many-locals,too-many-branches,too-many-statements
+    def run_pending(self) -> None:
         """
-        Overridden method from parent class, implementing the logic of the thread.
+        Schedules the execution that was due while the command was running.
         """
+        run_dt = self.pending_run_dt
+        if run_dt is not None:
+            self.pending_run_dt = None
+            self.app.scheduler.schedule(self, run_dt)
 
-        first_loop = True
-        while True:  # pylint: disable=too-many-nested-blocks
-
-            if self.isInterruptionRequested():
-                break
+    def invalidate_cache(self) -> None:
+        """
+        Discards the values cached from the command configuration, so they are resolved again in the next execution.
+        """
+        self._settings = None
 
-            now = datetime.utcnow()
+    def get_settings(self) -> ResolvedCommandSettings:
+        """
+        Returns the command settings merged with the global configuration; the working directory falls back to the user home directory if it is not set or doesn't exist.
+        """
+        if self._settings is None:
+            working_directory = self.command.working_directory
+            if not working_directory or not os.path.isdir(working_directory):
+                working_directory = HOME_DIR
+            self._settings = ResolvedCommandSettings(
+                include_output_in_notifications=coalesce(self.command.include_output_in_notifications, self.app.config.include_output_in_notifications),
+                show_complete_notifications=coalesce(self.command.show_complete_notifications, self.app.config.show_complete_notifications),
+                show_error_notifications=coalesce(self.command.show_error_notifications, self.app.config.show_error_notifications),
+                run_in_shell=coalesce(self.command.run_in_shell, self.app.config.run_in_shell),
+                restart_on_failure=coalesce(self.command.restart_on_failure, self.app.config.restart_on_failure),
+                restart_on_exit=coalesce(self.command.restart_on_exit, self.app.config.restart_on_exit),
+                working_directory=working_directory,
+                environment=self.command.environment_as_dict(),
+            )
+        return self._settings
+
+    def get_simple_argv(self, settings: ResolvedCommandSettings) -> Optional[List[str]]:
+        """
+        Returns the arguments to run the command without shell, or None if it needs the shell; the executable is looked up only when the command or its settings change.
+        """
+        command = self.command.command
+        if self._simple_argv is None or self._simple_argv[0] is not settings or self._simple_argv[1] != command:
+            argv = split_simple_command(command, path=settings.environment.get("PATH", os.environ.get("PATH")), working_directory=settings.working_directory)
+            self._simple_argv = (settings, command, argv)
+        return self._simple_argv[2]
 
-            next_run_dt = self.command.next_run_dt
-            next_run_past = False
-            if not next_run_dt:
-                next_run_dt = self.command.get_next_execution_dt()
-                self.command.next_run_dt = next_run_dt
-                self.app.save_config()
-                LOG.debug("Command %s - %s: empty next_run_dt; generated new one: %s.", self.command.name, self.command.command, self.command.next_run_dt)
-
-            if (now - timedelta(seconds=10)) > next_run_dt:
-                # Compare with now -10 seconds to allow the loop to check this date
-                old_next_run_dt = next_run_dt
-                next_run_past = True
-                if self.command.run_mode == ConfigCommandRunMode.PERIOD:
-                    next_run_dt = datetime.utcnow()
-                elif self.command.run_mode == ConfigCommandRunMode.CRON:
-                    next_run_dt = self.command.get_next_execution_dt(start_date=now)
-                else:
-                    LOG.critical("Command %s: run_mode not supported (%s).", self.command.name, self.command.run_mode.value)
-                self.command.next_run_dt = next_run_dt
-                self.app.save_config()
-                LOG.debug("Command %s - %s: next_run_dt was in the past (%s, now is %s); generated new one: %s.", self.command.name, self.command.command, old_next_run_dt, now, self.command.next_run_dt)
-
-            run_now = False
-            if first_loop:
-                first_loop = False
-                if self.is_startup:
-                    self.is_startup = False
-                    if self.command.run_at_startup:
-                        LOG.info("Command %s - %s: forcing to run the command because run_at_startup is true.", self.command.name, self.command.command)
-                        run_now = True
-                    elif self.command.run_at_startup_if_missing_previous_run and next_run_past:
-                        LOG.info("Command %s - %s: forcing to run the command because run_at_startup_if_missing_previous_run is true and the next_run_dt was before now.", self.command.name, self.command.command)
-                        run_now = True
-            else:
-                if now >= next_run_dt:
-                    LOG.info("Command %s - %s: running command because the next_run_dt has come (%s, now is %s).", self.command.name, self.command.command, next_run_dt, now)
-                    run_now = True
+    def get_script_path(self) -> str:
+        """
+        Returns the path of the file with the command script, writing it only if the script has changed or the file doesn't exist.
 
-            if self.force_run:
-                LOG.info("Command %s - %s: running command because force_run has been set.", self.command.name, self.command.command)
-                self.force_run = False
-                run_now = True
+        The path depends only on the command id, so a file left by a previous run of the application is overwritten instead of leaking.
+        """
+        script_key = (hash(self.command.script), self.command.run_script_powershell)
+        if self._script_key == script_key and self._script_path and os.path.exists(self._script_path):
+            return self._script_path
+        self.remove_script()
+        if sys.platform == "win32":
+            suffix = ".ps1" if self.command.run_script_powershell else ".bat"
+        else:
+            suffix = ".sh"
+        os.makedirs(SCRIPTS_DIR, exist_ok=True)
+        script_path = os.path.join(SCRIPTS_DIR, f"{slugify(self.command.id)}{suffix}")
+        # Written with the locale encoding, the one the shells expect
+        with open(script_path, "w", encoding=locale.getpreferredencoding(False)) as script_file:
+            if sys.platform != "win32" and not self.command.script.startswith("#!"):
+                # Add shebang if not present and not Windows
+                script_file.write("#!/bin/sh\n")
+            script_file.write(self.command.script)
+        if sys.platform != "win32":
+            file_stat = os.stat(script_path)
+            os.chmod(script_path, file_stat.st_mode | stat.S_IEXEC)
+        self._script_key = script_key
+        self._script_path = script_path
+        return script_path
+
+    def remove_script(self) -> None:
+        """
+        Removes the file with the command script, if it was generated.
+        """
+        if self._script_path:
+            try:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self._script_path)
+            except OSError as ex:
+                LOG.warning("Error removing the script file %s: %s", self._script_path, ex)
+        self._script_key = None
+        self._script_path = None
+
+    def get_first_run_dt(self, is_startup: Optional[bool] = False) -> Optional[datetime]:
+        """
+        Returns the date/time of the first execution of the command, checking if the previous one was missed and the startup options.
+        """
 
-            if not run_now:
-                QThread.sleep(1)
-                continue
+        now = datetime.utcnow()
+
+        next_run_dt = self.command.next_run_dt
+        next_run_past = False
+        if not next_run_dt:
+            next_run_dt = self.command.get_next_execution_dt()
+            # Not saved, it is generated again in the next start if lost
+            self.command.next_run_dt = next_run_dt
+            LOG.debug("Command %s - %s: empty next_run_dt; generated new one: %s.", self.command.name, self.command.command, self.command.next_run_dt)
+
+        if next_run_dt and now > next_run_dt:
+            old_next_run_dt = next_run_dt
+            next_run_past = True
+            if self.command.run_mode == ConfigCommandRunMode.PERIOD:
+                next_run_dt = now
+            elif self.command.run_mode == ConfigCommandRunMode.CRON:
+                next_run_dt = self.command.get_next_execution_dt(start_date=now)
+            else:
+                LOG.critical("Command %s: run_mode not supported (%s).", self.command.name, self.command.run_mode.value)
+            self.command.next_run_dt = next_run_dt
+            self.app.save_config()
+            LOG.debug("Command %s - %s: next_run_dt was in the past (%s, now is %s); generated new one: %s.", self.command.name, self.command.command, old_next_run_dt, now, self.command.next_run_dt)
+
+        if is_startup:
+            if self.command.run_at_startup:
+                LOG.info("Command %s - %s: forcing to run the command because run_at_startup is true.", self.command.name, self.command.command)
+                return now
+            if self.command.run_at_startup_if_missing_previous_run and next_run_past:
+                LOG.info("Command %s - %s: forcing to run the command because run_at_startup_if_missing_previous_run is true and the next_run_dt was before now.", self.command.name, self.command.command)
+                return now
+
+        return next_run_dt
+
+    def run(self):
+        """
+        Overridden method from parent class, running the command once and scheduling the next execution if it must be restarted.
+        """
+        if self.execute():
+            self.app.scheduler.schedule(self, self.command.next_run_dt)
 
-            script_path = None
-            try:
+    def execute(self) -> bool:  # pylint: disable=too-many-locals,too-many-branches,too-many-statements,too-many-return-statements
+        """
+        Runs the command, updating its statistics and sending the notifications; returns if the command must be run again.
+        """
 
-                include_output_in_notifications = coalesce(self.command.include_output_in_notifications, self.app.config.include_output_in_notifications)
-                show_complete_notifications = coalesce(self.command.show_complete_notifications, self.app.config.show_complete_notifications)
-                show_error_notifications = coalesce(self.command.show_error_notifications, self.app.config.show_error_notifications)
-
-                run_in_shell = coalesce(self.command.run_in_shell, self.app.config.run_in_shell)
-                restart_on_failure = coalesce(self.command.restart_on_failure, self.app.config.restart_on_failure)
-                restart_on_exit = coalesce(self.command.restart_on_exit, self.app.config.restart_on_exit)
-
-                working_directory = self.command.working_directory
-                if not working_directory or not os.path.exists(working_directory):
-                    working_directory = os.path.expanduser("~")
-
-                cmd = None
-                if self.command.command:
-                    cmd = self.command.command
-                elif self.command.script:
-                    run_in_shell = False
-                    if sys.platform == "win32":
-                        if self.command.run_script_powershell:
-                            file_descriptor, script_path = tempfile.mkstemp(suffix=".ps1", text=True)
-                            # https://github.com/PowerShell/PowerShell/issues/3028
-                            cmd = ["PowerShell.exe", "-WindowStyle", "hidden", "-NoLogo", "-NonInteractive", "-File", script_path]
-                        else:
-                            file_descriptor, script_path = tempfile.mkstemp(suffix=".bat", text=True)
-                            cmd = ["cmd", "/c", script_path]
+        command = self.command
+        try:
+
+            settings = self.get_settings()
+            run_in_shell = settings.run_in_shell
+
+            cmd = None
+            if command.command:
+                # The command may have been changed from a script
+                if self._script_path:
+                    self.remove_script()
+                cmd = command.command
+                if run_in_shell:
+                    # Skip the intermediate shell process when the command doesn't use any shell feature
+                    argv = self.get_simple_argv(settings)
+                    if argv:
+                        LOG.debug("Command %s: running without shell, as it doesn't need shell features.", command.name)
+                        cmd = argv
+                        run_in_shell = False
+            elif command.script:
+                run_in_shell = False
+                script_path = self.get_script_path()
+                if sys.platform == "win32":
+                    if command.run_script_powershell:
+                        # https://github.com/PowerShell/PowerShell/issues/3028
+                        cmd = ["PowerShell.exe", "-WindowStyle", "hidden", "-NoLogo", "-NonInteractive", "-File", script_path]
                     else:
-                        file_descriptor, script_path = tempfile.mkstemp(text=True)
-                        file_stat = os.stat(script_path)
-                        os.chmod(script_path, file_stat.st_mode | stat.S_IEXEC)
-                        cmd = script_path
-                    with os.fdopen(file_descriptor, "w") as script_file:
-                        if sys.platform != "win32" and not self.command.script.startswith("#!"):
-                            # Add shebang if not present and not Windows
-                            script_file.write("#!/bin/sh\n")
-                        script_file.write(self.command.script)
-                    LOG.debug("Command %s: generated file for script: %s", self.command.name, script_path)
+                        cmd = ["cmd", "/c", script_path]
                 else:
-                    LOG.critical("Command %s: no command or script set.", self.command.name)
-
-                if cmd:
-
-                    LOG.info("Executing command %s - %s...", self.command.name, self.command.command)
-                    start_time = now
-                    self.command.total_runs += 1
-                    self.command.last_run_dt = start_time
-                    exit_code = None
-                    error_message = None
-                    elapsed_time = None
-                    aborted = False
-                    stdout = None
-                    stderr = None
-                    try:
-                        pid, exit_code, stdout, stderr = run_command(command=cmd, environ=self.command.environment_as_dict(), run_in_shell=run_in_shell, working_directory=working_directory, thread=self)
-                        end_time = datetime.utcnow()
-                        elapsed_time = (end_time - start_time).total_seconds()
-                        LOG.debug("Command %s - %s exited with code %s (took %s seconds).", self.command.name, self.command.command, exit_code, f"{elapsed_time:.2f}")
-                        self.command.add_log(ConfigCommandLogItem(start_time=start_time, end_time=end_time, duration=elapsed_time, pid=pid, exit_code=exit_code, stdout=stdout, stderr=stderr))
-                        self.command.last_run_error_message = None
-                        self.command.last_run_exit_code = exit_code
-                        if exit_code == 0:
-                            self.command.last_successful_run_dt = start_time
-                            self.command.last_duration = elapsed_time
-                            if self.command.max_duration is None or elapsed_time > self.command.max_duration:
-                                self.command.max_duration = elapsed_time
-                            if self.command.min_duration is None or elapsed_time < self.command.min_duration:
-                                self.command.min_duration = elapsed_time
-                            if self.command.avg_duration is not None:
-                                self.command.avg_duration = ((self.command.avg_duration * self.command.ok_runs) + elapsed_time) / (self.command.ok_runs + 1)
-                            else:
-                                self.command.avg_duration = elapsed_time
-                            self.command.ok_runs += 1
+                    cmd = script_path
+                LOG.debug("Command %s: generated file for script: %s", command.name, script_path)
+            else:
+                LOG.critical("Command %s: no command or script set.", command.name)
+                return False
+
+            if cmd:
+
+                LOG.info("Executing command %s - %s...", command.name, command.command)
+                previous_icon_path = get_command_icon_path(command)
+                start_time = datetime.utcnow()
+                start_monotonic = time.monotonic()
+                command.total_runs += 1
+                command.last_run_dt = start_time
+                exit_code = None
+                error_message = None
+                elapsed_time = None
+                aborted = False
+                stdout = None
+                stderr = None
+                try:
+                    pid, exit_code, stdout, stderr = run_command(command=cmd, environ=settings.environment, run_in_shell=run_in_shell, working_directory=settings.working_directory, thread=self, max_output_size=MAX_OUTPUT_SIZE)
+                    elapsed_time = time.monotonic() - start_monotonic
+                    end_time = start_time + timedelta(seconds=elapsed_time)
+                    LOG.debug("Command %s - %s exited with code %s (took %.2f seconds).", command.name, command.command, exit_code, elapsed_time)
+                    command.add_log(ConfigCommandLogItem(start_time=start_time, end_time=end_time, duration=elapsed_time, pid=pid, exit_code=exit_code, stdout=stdout, stderr=stderr))
+                    command.last_run_error_message = None
+                    command.last_run_exit_code = exit_code
+                    if exit_code == 0:
+                        command.last_successful_run_dt = start_time
+                        command.last_duration = elapsed_time
+                        if command.max_duration is None or elapsed_time > command.max_duration:
+                            command.max_duration = elapsed_time
+                        if command.min_duration is None or elapsed_time < command.min_duration:
+                            command.min_duration = elapsed_time
+                        if command.avg_duration is not None:
+                            command.avg_duration = ((command.avg_duration * command.ok_runs) + elapsed_time) / (command.ok_runs + 1)
                         else:
-                            self.command.error_runs += 1
-                    except CommandAborted:
-                        # This happens when the command runner thread has been signaled to stop (because the program is being closed).
-                        # So we don't want to generate alerts/notifications when this happens, as this is because the user has initiated the action.
-                        end_time = datetime.utcnow()
-                        elapsed_time = (end_time - start_time).total_seconds()
-                        error_message = "Command aborted"
-                        aborted = True
-                        LOG.warning("Command %s - %s aborted.", self.command.name, self.command.command)
-                        self.command.add_log(ConfigCommandLogItem(start_time=start_time, end_time=end_time, duration=elapsed_time, aborted=True))
-                    except Exception as ex:  # pylint: disable=broad-except
-                        end_time = datetime.utcnow()
-                        elapsed_time = (end_time - start_time).total_seconds()
-                        error_message = str(ex)
-                        LOG.warning("Error running command %s - %s : %s.", self.command.name, self.command.command, error_message, exc_info=True)
-                        self.command.add_log(ConfigCommandLogItem(start_time=start_time, end_time=end_time, duration=elapsed_time, error_message=error_message))
-                        self.command.failed_runs += 1
-                        self.command.last_run_error_message = error_message
-                        self.command.last_run_exit_code = None
-
-                    # Save command run statistics
-                    self.command.next_run_dt = self.command.get_next_execution_dt()
-                    self.app.save_config()
-
-                    # Update statuses
-                    self.update_menu_signal.emit()
-
-                    if aborted:
-                        break
-
-                    if exit_code is None:
-                        # Failed to run
-                        if not restart_on_failure:
-                            if show_error_notifications:
-                                self.notification_signal.emit(self.command.name, gettext("Command failed to run ({error_message}).").format(error_message=error_message))
-                            break
-                        if show_error_notifications:
-                            self.notification_signal.emit(self.command.name, gettext("Command failed to run ({error_message}); restarting after {seconds_between_executions} seconds...").format(error_message=error_message, seconds_between_executions=self.command.seconds_between_executions))
-                    elif exit_code:
-                        # Exited with code > 0
-                        if not restart_on_failure:
-                            if show_error_notifications:
-                                if include_output_in_notifications and stdout and stderr:
-                                    self.notification_signal.emit(self.command.name, gettext("Command exited with code {exit_code} (took {elapsed_time:.2f} seconds).\n\nStandard output: {stdout}\n\nError output: {stderr}").format(exit_code=exit_code, elapsed_time=elapsed_time, stdout=stdout, stderr=stderr))
-                                elif include_output_in_notifications and stdout:
-                                    self.notification_signal.emit(self.command.name, gettext("Command exited with code {exit_code} (took {elapsed_time:.2f} seconds).\n\nStandard output: {stdout}").format(exit_code=exit_code, elapsed_time=elapsed_time, stdout=stdout))
-                                elif include_output_in_notifications and stderr:
-                                    self.notification_signal.emit(self.command.name, gettext("Command exited with code {exit_code} (took {elapsed_time:.2f} seconds).\n\nError output: {stderr}").format(exit_code=exit_code, elapsed_time=elapsed_time, stderr=stderr))
-                                else:
-                                    self.notification_signal.emit(self.command.name, gettext("Command exited with code {exit_code} (took {elapsed_time:.2f} seconds).").format(exit_code=exit_code, elapsed_time=elapsed_time))
-                            break
-                        if show_error_notifications:
-                            if include_output_in_notifications and stdout and stderr:
-                                self.notification_signal.emit(self.command.name, gettext("Command exited with code {exit_code} (took {elapsed_time:.2f} seconds); restarting after {seconds_between_executions} seconds...\n\nStandard output: {stdout}\n\nError output: {stderr}").format(exit_code=exit_code, elapsed_time=elapsed_time, seconds_between_executions=self.command.seconds_between_executions, stdout=stdout, stderr=stderr))
-                            elif include_output_in_notifications and stdout:
-                                self.notification_signal.emit(self.command.name, gettext("Command exited with code {exit_code} (took {elapsed_time:.2f} seconds); restarting after {seconds_between_executions} seconds...\n\nStandard output: {stdout}").format(exit_code=exit_code, elapsed_time=elapsed_time, seconds_between_executions=self.command.seconds_between_executions, stdout=stdout))
-                            elif include_output_in_notifications and stderr:
-                                self.notification_signal.emit(self.command.name, gettext("Command exited with code {exit_code} (took {elapsed_time:.2f} seconds); restarting after {seconds_between_executions} seconds...\n\nError output: {stderr}").format(exit_code=exit_code, elapsed_time=elapsed_time, seconds_between_executions=self.command.seconds_between_executions, stderr=stderr))
-                            else:
-                                self.notification_signal.emit(self.command.name, gettext("Command exited with code {exit_code} (took {elapsed_time:.2f} seconds); restarting after {seconds_between_executions} seconds...").format(exit_code=exit_code, elapsed_time=elapsed_time, seconds_between_executions=self.command.seconds_between_executions))
+                            command.avg_duration = elapsed_time
+                        command.ok_runs += 1
                     else:
-                        # Exited with code = 0
-                        if not restart_on_exit:
-                            if show_complete_notifications:
-                                if include_output_in_notifications and stdout and stderr:
-                                    self.notification_signal.emit(self.command.name, gettext("Command exited with code {exit_code} (took {elapsed_time:.2f} seconds).\n\nStandard output: {stdout}\n\nError output: {stderr}").format(exit_code=exit_code, elapsed_time=elapsed_time, stdout=stdout, stderr=stderr))
-                                elif include_output_in_notifications and stdout:
-                                    self.notification_signal.emit(self.command.name, gettext("Command exited with code {exit_code} (took {elapsed_time:.2f} seconds).\n\nStandard output: {stdout}").format(exit_code=exit_code, elapsed_time=elapsed_time, stdout=stdout))
-                                elif include_output_in_notifications and stderr:
-                                    self.notification_signal.emit(self.command.name, gettext("Command exited with code {exit_code} (took {elapsed_time:.2f} seconds).\n\nError output: {stderr}").format(exit_code=exit_code, elapsed_time=elapsed_time, stderr=stderr))
-                                else:
-                                    self.notification_signal.emit(self.command.name, gettext("Command exited with code {exit_code} (took {elapsed_time:.2f} seconds).").format(exit_code=exit_code, elapsed_time=elapsed_time))
-                            break
-                        if show_complete_notifications:
-                            if include_output_in_notifications and stdout and stderr:
-                                self.notification_signal.emit(self.command.name, gettext("Command exited with code {exit_code} (took {elapsed_time:.2f} seconds); restarting after {seconds_between_executions} seconds...\n\nStandard output: {stdout}\n\nError output: {stderr}").format(exit_code=exit_code, elapsed_time=elapsed_time, seconds_between_executions=self.command.seconds_between_executions, stdout=stdout, stderr=stderr))
-                            elif include_output_in_notifications and stdout:
-                                self.notification_signal.emit(self.command.name, gettext("Command exited with code {exit_code} (took {elapsed_time:.2f} seconds); restarting after {seconds_between_executions} seconds...\n\nStandard output: {stdout}").format(exit_code=exit_code, elapsed_time=elapsed_time, seconds_between_executions=self.command.seconds_between_executions, stdout=stdout))
-                            elif include_output_in_notifications and stderr:
-                                self.notification_signal.emit(self.command.name, gettext("Command exited with code {exit_code} (took {elapsed_time:.2f} seconds); restarting after {seconds_between_executions} seconds...\n\nError output: {stderr}").format(exit_code=exit_code, elapsed_time=elapsed_time, seconds_between_executions=self.command.seconds_between_executions, stderr=stderr))
-                            else:
-                                self.notification_signal.emit(self.command.name, gettext("Command exited with code {exit_code} (took {elapsed_time:.2f} seconds); restarting after {seconds_between_executions} seconds...").format(exit_code=exit_code, elapsed_time=elapsed_time, seconds_between_executions=self.command.seconds_between_executions))
-
-            except Exception as ex:  # pylint: disable=broad-except
-                LOG.error("Error during command execution: %s.", str(ex), exc_info=True)
-            finally:
-                if script_path and os.path.exists(script_path):
-                    os.remove(script_path)
+                        command.error_runs += 1
+                except CommandAborted:
+                    # This happens when the command runner thread has been signaled to stop (because the program is being closed).
+                    # So we don't want to generate alerts/notifications when this happens, as this is because the user has initiated the action.
+                    elapsed_time = time.monotonic() - start_monotonic
+                    end_time = start_time + timedelta(seconds=elapsed_time)
+                    error_message = "Command aborted"
+                    aborted = True
+                    LOG.warning("Command %s - %s aborted.", command.name, command.command)
+                    command.add_log(ConfigCommandLogItem(start_time=start_time, end_time=end_time, duration=elapsed_time, aborted=True))
+                except Exception as ex:  # pylint: disable=broad-except
+                    elapsed_time = time.monotonic() - start_monotonic
+                    end_time = start_time + timedelta(seconds=elapsed_time)
+                    error_message = str(ex)
+                    LOG.warning("Error running command %s - %s : %s.", command.name, command.command, error_message, exc_info=True)
+                    command.add_log(ConfigCommandLogItem(start_time=start_time, end_time=end_time, duration=elapsed_time, error_message=error_message))
+                    command.failed_runs += 1
+                    command.last_run_error_message = error_message
+                    command.last_run_exit_code = None
+
+                # Save command run statistics
+                command.next_run_dt = command.get_next_execution_dt()
+                self.save_stats_signal.emit()
+
+                # Update statuses, only if the result has changed
+                if get_command_icon_path(command) != previous_icon_path:
+                    self.update_menu_signal.emit(command)
+
+                if aborted:
+                    return False
+
+                if exit_code is None or exit_code:
+                    # Failed to run or exited with code > 0
+                    restart = settings.restart_on_failure
+                    show_notification = settings.show_error_notifications
+                else:
+                    # Exited with code = 0
+                    restart = settings.restart_on_exit
+                    show_notification = settings.show_complete_notifications
+                if show_notification:
+                    self.notification_signal.emit(command.name, format_command_notification(exit_code, elapsed_time, error_message, stdout, stderr, settings.include_output_in_notifications, command.seconds_between_executions if restart else None))
+                if not restart:
+                    return False
+        except Exception as ex:  # pylint: disable=broad-except
+            LOG.error("Error during command execution: %s.", str(ex), exc_info=True)
+        return True
 
 
 class TrayCmdRunnerApp:  # pylint: disable=too-many-instance-attributes
@@ -295,50 +508,61 @@ class TrayCmdRunnerApp:  # pylint: disable=too-many-instance-attributes
         if config_path is None:
             config_path = DEFAULT_CONFIG_FILE
         self.config_path = config_path
+        self._save_config_timer = QTimer()
+        self._save_config_timer.setSingleShot(True)
+        self._save_config_timer.setInterval(SAVE_CONFIG_DELAY_MS)
+        self._save_config_timer.timeout.connect(self.save_config_now)  # type: ignore[attr-defined] # pylint: disable=no-member
+        self._save_stats_timer = QTimer()
+        self._save_stats_timer.setSingleShot(True)
+        self._save_stats_timer.setInterval(SAVE_STATS_DELAY_MS)
+        self._save_stats_timer.timeout.connect(self.save_config_now)  # type: ignore[attr-defined] # pylint: disable=no-member
         conf_file_exists = True
         if not os.path.exists(self.config_path):
             conf_file_exists = False
         self.config: Config = Config.load_from_file(self.config_path)
+        # The runs counter is written together with the statistics of the commands, unless the file must be created
         self.config.app_runs += 1
-        self.save_config()
+        if conf_file_exists:
+            self.save_stats()
+        else:
+            self.save_config()
+        # Write the pending changes when the application exits for any reason (quit action, session logout, signals, etc.)
+        self.qt_app.aboutToQuit.connect(self.save_config_now)  # type: ignore[attr-defined] # pylint: disable=no-member
         if not log_level_already_set:
             logging.getLogger(tray_runner.__name__).setLevel(logging.getLevelName(self.config.log_level))
 
-        self.config_dialog: Optional[SettingsDialog] = None
-
-        # Create shortcut
-        if self.config.create_app_menu_shortcut:
-            create_tray_runner_app_menu_launcher()
-        else:
-            remove_app_menu_shortcut(APP_NAME)
+        self.config_dialog: Optional["SettingsDialog"] = None
 
-        # Create autostart
-        if self.config.auto_start:
-            create_tray_runner_autostart_shortcut()
-        else:
-            remove_app_menu_shortcut(APP_NAME, autostart=True)
+        # Create or remove the shortcuts once the event loop is running, so they don't delay showing the tray icon
+        QTimer.singleShot(0, self.update_shortcuts)
 
-        self._tray = QSystemTrayIcon(icon=QIcon(ICON_PATH))
+        self._notification_icon = get_icon(ICON_PATH)
+        self._tray = QSystemTrayIcon(icon=self._notification_icon)
         self._tray.setToolTip(APP_NAME)
         self._tray.setVisible(True)
 
-        # Init the list of command threads
-        self.command_threads: List[CommandThread] = []
+        # Init the command threads, indexed by the identity of their command
+        self.command_threads: Dict[int, CommandThread] = {}
 
-        # Create the menu
+        # Create the menu; the command actions are kept to update their icons without rebuilding it
         self._menu = QMenu()
+        self._command_actions: Dict[int, QAction] = {}
+        self._menu_commands_key: Tuple[Tuple[int, str, str], ...] = ()
+        self._has_error: Optional[bool] = None
         self.rebuild_menu()
 
         # Add the menu to the tray
         self._tray.setContextMenu(self._menu)
 
-        # Init command threads
+        # Init command threads and schedule their first execution
+        self.scheduler = CommandScheduler()
         for command in self.config.commands:
             if not command.disabled:
-                command_thread = CommandThread(self, command, is_startup=True)
-                command_thread.start()
-                self.command_threads.append(command_thread)
-        LOG.info("Current number of threads running: %s", len(self.command_threads))
+                command_thread = CommandThread(self, command)
+                self.command_threads[id(command)] = command_thread
+                self.scheduler.schedule(command_thread, command_thread.get_first_run_dt(is_startup=True))
+        self.scheduler.start()
+        LOG.info("Current number of commands scheduled: %s", len(self.command_threads))
 
         if show_config:
             self.edit_configuration()
@@ -347,10 +571,44 @@ class TrayCmdRunnerApp:  # pylint: disable=too-many-instance-attributes
             if QMessageBox.question(self.main_window, gettext("Welcome"), gettext("Welcome! This is the first time you run the application. Do you want to configure it?")) == QMessageBox.StandardButton.Yes:
                 self.edit_configuration()
 
+    def update_shortcuts(self):
+        """
+        Creates or removes the application menu and autostart shortcuts, according to the configuration.
+        """
+        # Create shortcut
+        if self.config.create_app_menu_shortcut:
+            create_tray_runner_app_menu_launcher()
+        else:
+            remove_tray_runner_app_menu_launcher()
+
+        # Create autostart
+        if self.config.auto_start:
+            create_tray_runner_autostart_shortcut()
+        else:
+            remove_tray_runner_autostart_shortcut()
+
     def save_config(self):
         """
-        Saves the configuration.
+        Schedules the save of the configuration; all the changes done until the save happens are written at once.
+
+        It must be called from the main thread; command threads use their save_stats_signal instead.
+        """
+        if not self._save_config_timer.isActive():
+            self._save_config_timer.start()
+
+    def save_stats(self):
+        """
+        Schedules the save of the configuration after a command run, batching the statistics of all the runs until then in a single write.
+        """
+        if not self._save_stats_timer.isActive() and not self._save_config_timer.isActive():
+            self._save_stats_timer.start()
+
+    def save_config_now(self):
+        """
+        Saves the configuration immediately, cancelling any pending save.
         """
+        self._save_config_timer.stop()
+        self._save_stats_timer.stop()
         self.config.save_to_file(self.config_path)
 
     def rebuild_menu(self) -> None:
@@ -360,29 +618,42 @@ class TrayCmdRunnerApp:  # pylint: disable=too-many-instance-attributes
 
         # Remove previous elements
         self._menu.clear()
+        self._command_actions = {}
+        self._menu_commands_key = self.get_menu_commands_key()
 
         # Sample action
-        for command in sorted(self.config.commands, key=lambda x: x.name.lower()):
+        for command in self.config.get_sorted_commands():
             if not command.disabled:
-                if command.last_run_error_message or command.last_run_exit_code:
-                    icon = COMMAND_ERROR_ICON_PATH
-                else:
-                    icon = COMMAND_OK_ICON_PATH
-                self._menu.addAction(QIcon(icon), command.name, partial(click.launch, command.get_log_file_path()))
+                self._command_actions[id(command)] = self._menu.addAction(get_icon(get_command_icon_path(command)), command.name, partial(launch_in_background, command.get_log_file_path()))
 
         # Separator
         self._menu.addSeparator()
 
         # Configuration edit
-        self._menu.addAction(QIcon(SETTINGS_ICON_PATH), gettext("Configuration"), self.edit_configuration)
+        self._menu.addAction(get_icon(SETTINGS_ICON_PATH), gettext("Configuration"), self.edit_configuration)
         # self._menu.addAction(QIcon(SETTINGS_ICON_PATH), gettext("Edit configuration"), self.edit_configuration_file)
 
         # Add a About and Quit options to the menu.
         if __version__ == DEVELOPMENT_VERSION:
-            self._menu.addAction(QIcon(ABOUT_ICON_PATH), gettext("About - {version}").format(version=gettext("Development")), self.about)
+            self._menu.addAction(get_icon(ABOUT_ICON_PATH), gettext("About - {version}").format(version=gettext("Development")), self.about)
         else:
-            self._menu.addAction(QIcon(ABOUT_ICON_PATH), gettext("About - {version}").format(version=__version__), self.about)
-        self._menu.addAction(QIcon(EXIT_ICON_PATH), gettext("Quit"), self.quit)
+            self._menu.addAction(get_icon(ABOUT_ICON_PATH), gettext("About - {version}").format(version=__version__), self.about)
+        self._menu.addAction(get_icon(EXIT_ICON_PATH), gettext("Quit"), self.quit)
+
+    def get_menu_commands_key(self) -> Tuple[Tuple[int, str, str], ...]:
+        """
+        Returns the commands shown in the menu, with the values used to build their actions; if it changes, the menu must be rebuilt.
+        """
+        return tuple((id(command), command.id, command.name) for command in self.config.get_sorted_commands() if not command.disabled)
+
+    def refresh_command_icons(self) -> None:
+        """
+        Updates the icons of the command actions in the menu, according to the result of their last execution.
+        """
+        for command_thread in self.command_threads.values():
+            action = self._command_actions.get(id(command_thread.command))
+            if action:
+                action.setIcon(get_icon(get_command_icon_path(command_thread.command)))
 
     def edit_configuration(self, warning_style: Optional[int] = None, warning_text: Optional[str] = None):
         """
@@ -393,6 +664,8 @@ class TrayCmdRunnerApp:  # pylint: disable=too-many-instance-attributes
             self.config_dialog.raise_()
             self.config_dialog.activateWindow()
         else:
+            from tray_runner.gui.settings_dialog import SettingsDialog  # pylint: disable=import-outside-toplevel
+
             self.config_dialog = SettingsDialog(self.main_window, self, warning_style, warning_text)
             self.config_dialog.exec()
             self.config_dialog = None
@@ -401,59 +674,79 @@ class TrayCmdRunnerApp:  # pylint: disable=too-many-instance-attributes
         """
         Calls the OS functions to open the configuration file and edit it.
         """
-        self._tray.showMessage(gettext("Edit configuration"), gettext("The configuration file will be opened in the default editor."), QIcon(SETTINGS_ICON_PATH))
-        click.launch(self.config_path)
+        self._tray.showMessage(gettext("Edit configuration"), gettext("The configuration file will be opened in the default editor."), get_icon(SETTINGS_ICON_PATH))
+        launch_in_background(self.config_path)
 
     def update_status(self):
         """
-        Function that updates tray icon and tooltip, according to the commands' status. Usually fired by the signals from the command threads.
+        Function that updates tray icon and tooltip, according to the commands' status, and the menu, rebuilding it if the commands have changed.
+        """
+        self.update_tray_status()
+        if self.get_menu_commands_key() != self._menu_commands_key:
+            self.rebuild_menu()
+        else:
+            self.refresh_command_icons()
+
+    def update_command_status(self, command: ConfigCommand):
+        """
+        Updates the menu icon of a command and the tray status after it has been run. Usually fired by the signals from the command threads.
+        """
+        action = self._command_actions.get(id(command))
+        if action:
+            action.setIcon(get_icon(get_command_icon_path(command)))
+        self.update_tray_status()
+
+    def update_tray_status(self):
+        """
+        Updates the tray icon and tooltip if the global status (some command has errors or not) has changed.
         """
         has_error = False
-        for command_thread in self.command_threads:
+        for command_thread in self.command_threads.values():
             if command_thread.command.last_run_error_message or command_thread.command.last_run_exit_code:
                 has_error = True
                 break
+        if has_error == self._has_error:
+            return
+        self._has_error = has_error
         if has_error:
-            self._tray.setIcon(QIcon(WARNING_ICON_PATH))
+            self._tray.setIcon(get_icon(WARNING_ICON_PATH))
             self._tray.setToolTip(gettext("{app_name}: One or more commands have errors.").format(app_name=APP_NAME))
         else:
-            self._tray.setIcon(QIcon(REGULAR_ICON_PATH))
+            self._tray.setIcon(get_icon(REGULAR_ICON_PATH))
             self._tray.setToolTip(gettext("{app_name}: Everything is OK.").format(app_name=APP_NAME))
-        self.rebuild_menu()
 
     def show_notification(self, title, message):
         """
         Shows a notification provided by the tray. Usually fired by the signals from the command threads.
         """
-        self._tray.showMessage(title, message, QIcon(ICON_PATH))
+        self._tray.showMessage(title, message, self._notification_icon)
 
     def stop_command_thread(self, command: ConfigCommand):
         """
         Finds and stops the thread associated with the command.
         """
         LOG.debug("Searching for command %s - %s and stopping it...", command.name, command.command)
-        for i in self.command_threads:
-            if i.command == command:
-                LOG.debug("Command %s - %s found; stopping it...", command.name, command.command)
-                i.requestInterruption()
-                i.wait()
-                self.command_threads.remove(i)
-                self.update_status()
-                break
+        command_thread = self.command_threads.pop(id(command), None)
+        if command_thread:
+            LOG.debug("Command %s - %s found; stopping it...", command.name, command.command)
+            self.scheduler.unschedule(command_thread)
+            command_thread.requestInterruption()
+            command_thread.wait()
+            command_thread.remove_script()
+            self.update_status()
         else:
             LOG.debug("Command %s - %s NOT found; perhaps it was disabled or not running before.", command.name, command.command)
-        LOG.info("Current number of threads running: %s", len(self.command_threads))
+        LOG.info("Current number of commands scheduled: %s", len(self.command_threads))
 
     def force_command_thread_run_now(self, command: ConfigCommand):
         """
         Finds and stops the thread associated with the command.
         """
         LOG.debug("Searching for command %s - %s to force run...", command.name, command.command)
-        for i in self.command_threads:
-            if i.command == command:
-                LOG.debug("Command %s - %s found; setting force_run...", command.name, command.command)
-                i.force_run = True
-                break
+        command_thread = self.command_threads.get(id(command))
+        if command_thread:
+            LOG.debug("Command %s - %s found; scheduling it to run now...", command.name, command.command)
+            self.scheduler.schedule(command_thread, datetime.utcnow())
         else:
             LOG.debug("Command %s - %s NOT found; perhaps it was disabled or not running before.", command.name, command.command)
 
@@ -461,10 +754,14 @@ class TrayCmdRunnerApp:  # pylint: disable=too-many-instance-attributes
         """
         Finds the thread associated to the command.
         """
-        for command_thread in self.command_threads:
-            if command_thread.command == command:
-                return command_thread
-        return None
+        return self.command_threads.get(id(command))
+
+    def invalidate_command_settings(self):
+        """
+        Discards the cached settings of all the command threads; called when the global configuration changes.
+        """
+        for command_thread in self.command_threads.values():
+            command_thread.invalidate_cache()
 
     def start_command_thread(self, command: ConfigCommand):
         """
@@ -473,20 +770,26 @@ class TrayCmdRunnerApp:  # pylint: disable=too-many-instance-attributes
         if command.disabled:
             LOG.warning("Trying to start the command %s - %s, that is disabled; skipping...", command.name, command.command)
             return
-        for command_thread in self.command_threads:
-            if command_thread.command == command:
-                LOG.warning("Command %s - %s is already running; skipping...", command.name, command.command)
-                break
+        command_thread = self.command_threads.get(id(command))
+        if command_thread:
+            LOG.debug("Command %s - %s is already scheduled; updating its next execution...", command.name, command.command)
+            command_thread.invalidate_cache()
+            # The script may have been edited or removed; if the command is running, it is replaced or removed in its next execution
+            if not command_thread.isRunning():
+                command_thread.remove_script()
+            self.scheduler.schedule(command_thread, command.next_run_dt)
         else:
             command_thread = CommandThread(self, command)
-            command_thread.start()
-            self.command_threads.append(command_thread)
-        LOG.info("Current number of threads running: %s", len(self.command_threads))
+            self.command_threads[id(command)] = command_thread
+            self.scheduler.schedule(command_thread, command_thread.get_first_run_dt())
+        LOG.info("Current number of commands scheduled: %s", len(self.command_threads))
 
     def about(self):  # pylint: disable=no-self-use
         """
         Displays the application's about dialog.
         """
+        import webbrowser  # pylint: disable=import-outside-toplevel
+
         webbrowser.open(APP_URL)
 
     def quit(self):
@@ -499,21 +802,26 @@ class TrayCmdRunnerApp:  # pylint: disable=too-many-instance-attributes
             return
 
         LOG.info("Stopping threads...")
-        for i in self.command_threads:
+        self.scheduler.stop()
+        for i in self.command_threads.values():
             if i.isRunning():
                 i.requestInterruption()
 
         LOG.info("Waiting for threads to stop...")
-        for i in self.command_threads:
+        for i in self.command_threads.values():
             if i.isRunning():
                 i.wait()
+            i.remove_script()
+
+        LOG.info("Saving configuration...")
+        self.save_config_now()
 
         self.qt_app.quit()
 
 
 @click.command()
 @click.option("--config", "-c", "config_path", type=click.Path(exists=True, dir_okay=False, resolve_path=True), required=False, help="Path to configuration file.")
-@click.option("--log-level", type=click.Choice([logging.getLevelName(x) for x in [logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR, logging.CRITICAL]], case_sensitive=False), show_default=True)
+@click.option("--log-level", type=click.Choice(LOG_LEVEL_NAMES, case_sensitive=False), show_default=True)
 @click.option("--show-config", is_flag=True, default=False)
 @click.version_option(__version__)
 def run(config_path: str | None, log_level: str | None, show_config: bool) -> None:
@@ -523,49 +831,64 @@ def run(config_path: str | None, log_level: str | None, show_config: bool) -> No
 
     # Init logging
     formatter = logging.Formatter("%(asctime)s - %(relativepath)s:%(lineno)s - %(name)s:%(funcName)s - %(levelname)s - %(message)s")
+    package_path_filter = PackagePathFilter()
     logging.getLogger("").setLevel(logging.NOTSET)
     if log_level:
         logging.getLogger(tray_runner.__name__).setLevel(logging.getLevelName(log_level))
 
     # Configure rotating file handler
-    if not os.path.exists(tray_runner.APP_DIR):
-        os.makedirs(tray_runner.APP_DIR)
+    os.makedirs(tray_runner.APP_DIR, exist_ok=True)
     rotating_file_handler = RotatingFileHandler(filename=os.path.join(tray_runner.APP_DIR, f"{APP_ID}.log"), maxBytes=5 * 1024 * 1025, backupCount=10)  # 10 files of 5 MB
-    rotating_file_handler.addFilter(PackagePathFilter())
+    rotating_file_handler.addFilter(package_path_filter)
     rotating_file_handler.setFormatter(formatter)
-    logging.getLogger("").addHandler(rotating_file_handler)
 
     # Configure stderr handler
     stderr_handler = logging.StreamHandler(sys.stderr)
-    stderr_handler.addFilter(PackagePathFilter())
+    stderr_handler.addFilter(package_path_filter)
     stderr_handler.setFormatter(formatter)
-    logging.getLogger("").addHandler(stderr_handler)
-
-    # Init application
-    qt_app = QApplication([])
-    qt_app.setQuitOnLastWindowClosed(False)
-    # qt_app.setApplicationDisplayName("Command runner")
-
-    main_window = QMainWindow()
-    main_window.setWindowIcon(QIcon(ICON_PATH))
-
-    lock_file_path = os.path.join(tempfile.gettempdir(), "tray-runner-gui.lock")
-    lock_file = QLockFile(lock_file_path)
-    if not lock_file.tryLock():
-        QMessageBox.critical(main_window, gettext("Application already running"), gettext("The application is already running."))
-        sys.exit(1)
-
-    # Create the application
-    app = TrayCmdRunnerApp(qt_app, main_window, config_path, log_level_already_set=bool(log_level), show_config=show_config)
 
-    # Control-C handler
-    # https://stackoverflow.com/a/4939113/576138
-    signal.signal(signal.SIGINT, lambda *_a: app.quit())
-    timer = QTimer()
-    timer.start(500)
-    timer.timeout.connect(lambda: None)  # type: ignore[attr-defined] # pylint: disable=no-member
+    # The handlers run in a separate thread, so the command threads and the UI don't wait for the writes
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    logging.getLogger("").addHandler(QueueHandler(log_queue))
+    log_listener = QueueListener(log_queue, rotating_file_handler, stderr_handler, respect_handler_level=True)
+    log_listener.start()
 
+    # The listener is stopped on any exit, so the queued records (e.g. the errors before exiting) are written
     try:
-        sys.exit(qt_app.exec())
+        # Init application
+        qt_app = QApplication([])
+        qt_app.setQuitOnLastWindowClosed(False)
+        # qt_app.setApplicationDisplayName("Command runner")
+
+        main_window = QMainWindow()
+        main_window.setWindowIcon(get_icon(ICON_PATH))
+
+        lock_file_path = os.path.join(tempfile.gettempdir(), "tray-runner-gui.lock")
+        lock_file = QLockFile(lock_file_path)
+        # The lock is held while the application runs, so it must not become stale by age; locks left by a crashed instance are still detected by its PID
+        lock_file.setStaleLockTime(0)
+        if not lock_file.tryLock(LOCK_FILE_WAIT_MS):
+            LOG.error("The application is already running (lock file %s).", lock_file_path)
+            QMessageBox.critical(main_window, gettext("Application already running"), gettext("The application is already running."))
+            sys.exit(1)
+
+        # Create the application
+        app = TrayCmdRunnerApp(qt_app, main_window, config_path, log_level_already_set=bool(log_level), show_config=show_config)
+
+        # Control-C handler
+        # The signal wakes up the event loop writing to a socket, and the Python handler runs when the notifier slot is called
+        signal_read_socket, signal_write_socket = socket.socketpair()
+        signal_read_socket.setblocking(False)
+        signal_write_socket.setblocking(False)
+        signal.set_wakeup_fd(signal_write_socket.fileno())
+        signal.signal(signal.SIGINT, lambda *_a: app.quit())
+        signal.signal(signal.SIGTERM, lambda *_a: app.quit())
+        signal_notifier = QSocketNotifier(signal_read_socket.fileno(), QSocketNotifier.Type.Read)
+        signal_notifier.activated.connect(lambda *_a: signal_read_socket.recv(64))  # type: ignore[attr-defined] # pylint: disable=no-member
+
+        try:
+            sys.exit(qt_app.exec())
+        finally:
+            lock_file.unlock()
     finally:
-        lock_file.unlock()
+        log_listener.stop()
@@ -2,25 +2,40 @@
 tray_runner.gui.settings modules.
 """
 import os
+import re
 import uuid
 from gettext import gettext
 from typing import TYPE_CHECKING, Optional
 
-from babel.dates import format_datetime
-from babel.numbers import format_decimal
 from croniter import croniter
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QCursor, QStandardItem, QStandardItemModel
 from PySide6.QtWidgets import QCheckBox, QComboBox, QDialog, QFileDialog, QHeaderView, QLabel, QLineEdit, QMenu, QMessageBox, QPlainTextEdit, QPushButton, QSpinBox, QTableView, QTabWidget, QWidget
-from slugify import slugify
 
-from tray_runner.common_utils.common import ensure_local_datetime, get_simple_default_locale
+from tray_runner.common_utils.common import ensure_local_datetime, get_default_babel_locale
 from tray_runner.common_utils.qt import checkbox_tristate_from_val, checkbox_tristate_to_val, load_ui
 from tray_runner.config import ConfigCommand, ConfigCommandEnvironmentVariable, ConfigCommandRunMode
+from tray_runner.gui.constants import COMMAND_DIALOG_UI_PATH
 
 if TYPE_CHECKING:
     from tray_runner.gui import TrayCmdRunnerApp
 
+# Characters that can appear in a cron expression; used to discard invalid input before parsing it with croniter
+CRON_EXPR_CHARS_REGEX = re.compile(r"^[0-9A-Za-z*?#@,/\-\s]+$")
+
+# Valid command IDs: lowercase letters and numbers in groups separated by single hyphens, i.e. strings that slugify leaves unchanged
+COMMAND_ID_REGEX = re.compile(r"^[a-z0-9]+(?:-[a-z0-9]+)*$")
+
+# Command options that fall back to the global configuration when not set, and the tristate checkboxes that edit them
+TRISTATE_FIELDS = (
+    ("run_in_shell", "run_in_shell_checkbox"),
+    ("restart_on_exit", "restart_on_exit_checkbox"),
+    ("restart_on_failure", "restart_on_failure_checkbox"),
+    ("include_output_in_notifications", "include_output_in_notifications_checkbox"),
+    ("show_complete_notifications", "show_complete_notifications_checkbox"),
+    ("show_error_notifications", "show_error_notifications_checkbox"),
+)
+
 
 class CommandDialog(QDialog):
     """
@@ -72,97 +87,121 @@ class CommandDialog(QDialog):
     max_duration_label: QLabel
     avg_duration_label: QLabel
 
-    def __init__(self, parent: QWidget, app: "TrayCmdRunnerApp", command: ConfigCommand, is_new: Optional[bool] = False):  # pylint: disable=too-many-statements,too-many-branches
+    def __init__(self, parent: QWidget, app: "TrayCmdRunnerApp", command: ConfigCommand, is_new: Optional[bool] = False):
         """
         CommandDialog constructor.
         """
         super().__init__(parent)
         self.app = app
-        self.command = command
-        self.is_new = is_new
-        load_ui(os.path.join(os.path.dirname(__file__), "command_dialog.ui"), self)
+        load_ui(COMMAND_DIALOG_UI_PATH, self)
 
         # Center relative to parent
         geo = self.geometry()
         geo.moveCenter(self.parentWidget().geometry().center())
         self.setGeometry(geo)
 
+        self.working_directory_choose_button.clicked.connect(self.working_directory_choose_button_clicked)
+        self.run_mode_combo_box.currentIndexChanged.connect(self.on_run_mode_combo_box_currentIndexChanged)
+        for run_mode in ConfigCommandRunMode:
+            self.run_mode_combo_box.addItem(run_mode.display_name(), run_mode.value)
+        self.environment_table.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.environment_table.customContextMenuRequested.connect(self.environment_table_menu)
+
+        self.set_command(command, is_new)
+
+    def set_command(self, command: ConfigCommand, is_new: Optional[bool] = False):  # pylint: disable=too-many-statements,too-many-branches
+        """
+        Fills the form with the data of the command, so the same dialog can be reused to add or edit several commands.
+        """
+        self.command = command
+        self.is_new = is_new
+        self.tabs.setCurrentIndex(0)
+
         self.id_text_box.setText(self.command.id)
-        if is_new:
-            self.id_text_box.setEnabled(True)
+        self.id_text_box.setEnabled(bool(is_new))
         self.name_text_box.setText(self.command.name)
-        if self.command.description:
-            self.description_text_box.setPlainText(self.command.description)
-        if self.command.command:
-            self.command_text_box.setText(self.command.command)
-        if self.command.script:
-            self.script_text_box.setPlainText(self.command.script)
+        self.description_text_box.setPlainText(self.command.description or "")
+        self.command_text_box.setText(self.command.command or "")
+        self.script_text_box.setPlainText(self.command.script or "")
         self.run_script_powershell_check_box.setChecked(self.command.run_script_powershell)
         self.working_directory_text_box.setText(self.command.working_directory)
-        self.working_directory_choose_button.clicked.connect(self.working_directory_choose_button_clicked)
         self.max_log_count_spin_box.setValue(self.command.max_log_count)
         self.disabled_checkbox.setChecked(self.command.disabled)
 
         self.run_at_startup_check_box.setChecked(self.command.run_at_startup)
         self.run_at_startup_if_missing_previous_run_check_box.setChecked(self.command.run_at_startup_if_missing_previous_run)
-        self.run_mode_combo_box.currentIndexChanged.connect(self.on_run_mode_combo_box_currentIndexChanged)
-        for idx, data in enumerate(ConfigCommandRunMode):
-            self.run_mode_combo_box.addItem(data.display_name(), data.value)
-            if data.value == self.command.run_mode.value:
-                self.run_mode_combo_box.setCurrentIndex(idx)
-        self.run_mode_combo_box.currentIndexChanged.connect(self.on_run_mode_combo_box_currentIndexChanged)
+        self.run_mode_combo_box.setCurrentIndex(self.run_mode_combo_box.findData(self.command.run_mode.value))
         self.seconds_between_executions_spin_box.setValue(self.command.seconds_between_executions)
-        if self.command.cron_expr:
-            self.cron_expr_text_box.setText(self.command.cron_expr)
-
-        self.run_in_shell_checkbox.setCheckState(checkbox_tristate_from_val(self.command.run_in_shell))
-        self.restart_on_exit_checkbox.setCheckState(checkbox_tristate_from_val(self.command.restart_on_exit))
-        self.restart_on_failure_checkbox.setCheckState(checkbox_tristate_from_val(self.command.restart_on_failure))
-        self.include_output_in_notifications_checkbox.setCheckState(checkbox_tristate_from_val(self.command.include_output_in_notifications))
-        self.show_complete_notifications_checkbox.setCheckState(checkbox_tristate_from_val(self.command.show_complete_notifications))
-        self.show_error_notifications_checkbox.setCheckState(checkbox_tristate_from_val(self.command.show_error_notifications))
-
-        self.environment_table_model = QStandardItemModel()
-        self.environment_table_model.setHorizontalHeaderLabels([gettext("Key"), gettext("Value")])
-        self.environment_table.setModel(self.environment_table_model)
-        self.environment_table.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.environment_table.customContextMenuRequested.connect(self.environment_table_menu)
-        for env in sorted(self.command.environment, key=lambda x: x.key.lower()):
-            self.environment_table_model.appendRow((QStandardItem(env.key), QStandardItem(env.value)))
+        self.cron_expr_text_box.setText(self.command.cron_expr or "")
+
+        for field_name, checkbox_name in TRISTATE_FIELDS:
+            getattr(self, checkbox_name).setCheckState(checkbox_tristate_from_val(getattr(self.command, field_name)))
+
+        # The model is filled before attaching it to the view, so the table is laid out only once
+        environment = sorted(self.command.environment, key=lambda x: x.key.lower())
+        model = QStandardItemModel(len(environment), 2)
+        model.setHorizontalHeaderLabels([gettext("Key"), gettext("Value")])
+        for row, env in enumerate(environment):
+            model.setItem(row, 0, QStandardItem(env.key))
+            model.setItem(row, 1, QStandardItem(env.value))
+        # Replace the model in the view before releasing the previous one
+        self.environment_table.setModel(model)
+        self.environment_table_model = model
 
         header = self.environment_table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.Stretch)
         header.setSectionResizeMode(1, QHeaderView.Stretch)
 
-        self.total_runs_label.setText(format_decimal(self.command.total_runs, locale=get_simple_default_locale()))
-        self.ok_runs_label.setText(format_decimal(self.command.ok_runs, locale=get_simple_default_locale()))
-        self.error_runs_label.setText(format_decimal(self.command.error_runs, locale=get_simple_default_locale()))
-        self.failed_runs_label.setText(format_decimal(self.command.failed_runs, locale=get_simple_default_locale()))
-        self.last_run_dt_label.setText(format_datetime(ensure_local_datetime(self.command.last_run_dt), locale=get_simple_default_locale()) if self.command.last_run_dt else gettext("Never"))
-        if self.is_new:
-            self.next_run_dt_label.setText(gettext("Unknown"))
-        elif self.command.disabled:
-            self.next_run_dt_label.setText(gettext("Never (command disabled)"))
-        else:
-            next_run_dt = self.command.get_next_execution_dt()
-            if next_run_dt:
-                self.next_run_dt_label.setText(format_datetime(ensure_local_datetime(next_run_dt), locale=get_simple_default_locale()))
-            else:
-                self.next_run_dt_label.setText(gettext("Unknown"))
-        self.last_run_exit_code_label.setText(str(self.command.last_run_exit_code) if self.command.last_run_exit_code is not None else gettext("Unknown"))
-        self.last_successful_run_dt_label.setText(format_datetime(ensure_local_datetime(self.command.last_successful_run_dt), locale=get_simple_default_locale()) if self.command.last_successful_run_dt else gettext("Never"))
-        self.last_duration_label.setText(gettext("{seconds} seconds").format(seconds=format_decimal(self.command.last_duration, locale=get_simple_default_locale())) if self.command.last_duration is not None else gettext("Unknown"))
-        self.min_duration_label.setText(gettext("{seconds} seconds").format(seconds=format_decimal(self.command.min_duration, locale=get_simple_default_locale())) if self.command.min_duration is not None else gettext("Unknown"))
-        self.max_duration_label.setText(gettext("{seconds} seconds").format(seconds=format_decimal(self.command.max_duration, locale=get_simple_default_locale())) if self.command.max_duration is not None else gettext("Unknown"))
-        self.avg_duration_label.setText(gettext("{seconds} seconds").format(seconds=format_decimal(self.command.avg_duration, locale=get_simple_default_locale())) if self.command.avg_duration is not None else gettext("Unknown"))
-
         if self.is_new:
+            self.set_new_command_statistics()
             self.id_text_box.setFocus()
             self.setWindowTitle(gettext("Add new command"))
         else:
+            self.set_command_statistics()
             self.name_text_box.setFocus()
             self.setWindowTitle(gettext("Edit command {command_name}").format(command_name=self.command.name))
 
+    def set_new_command_statistics(self):
+        """
+        Fills the statistics labels for a command that has never been run, without loading Babel.
+        """
+        never_text = gettext("Never")
+        unknown_text = gettext("Unknown")
+        for label in (self.total_runs_label, self.ok_runs_label, self.error_runs_label, self.failed_runs_label):
+            label.setText("0")
+        for label in (self.last_run_dt_label, self.last_successful_run_dt_label):
+            label.setText(never_text)
+        for label in (self.last_duration_label, self.min_duration_label, self.max_duration_label, self.avg_duration_label, self.next_run_dt_label, self.last_run_exit_code_label):
+            label.setText(unknown_text)
+
+    def set_command_statistics(self):
+        """
+        Fills the statistics labels with the data of the command, formatted for the user locale.
+        """
+        # Babel is only needed by the dialogs, so it is not loaded at startup
+        from babel.dates import format_datetime  # pylint: disable=import-outside-toplevel
+        from babel.numbers import format_decimal  # pylint: disable=import-outside-toplevel
+
+        babel_locale = get_default_babel_locale()
+        never_text = gettext("Never")
+        unknown_text = gettext("Unknown")
+        seconds_text = gettext("{seconds} seconds")
+        for label, count in ((self.total_runs_label, self.command.total_runs), (self.ok_runs_label, self.command.ok_runs), (self.error_runs_label, self.command.error_runs), (self.failed_runs_label, self.command.failed_runs)):
+            label.setText(format_decimal(count, locale=babel_locale))
+        for label, run_dt in ((self.last_run_dt_label, self.command.last_run_dt), (self.last_successful_run_dt_label, self.command.last_successful_run_dt)):
+            label.setText(format_datetime(ensure_local_datetime(run_dt), locale=babel_locale) if run_dt else never_text)
+        for label, duration in ((self.last_duration_label, self.command.last_duration), (self.min_duration_label, self.command.min_duration), (self.max_duration_label, self.command.max_duration), (self.avg_duration_label, self.command.avg_duration)):
+            label.setText(seconds_text.format(seconds=format_decimal(duration, locale=babel_locale)) if duration is not None else unknown_text)
+        if self.command.disabled:
+            self.next_run_dt_label.setText(gettext("Never (command disabled)"))
+        else:
+            next_run_dt = self.command.get_next_execution_dt()
+            if next_run_dt:
+                self.next_run_dt_label.setText(format_datetime(ensure_local_datetime(next_run_dt), locale=babel_locale))
+            else:
+                self.next_run_dt_label.setText(unknown_text)
+        self.last_run_exit_code_label.setText(str(self.command.last_run_exit_code) if self.command.last_run_exit_code is not None else unknown_text)
+
     def working_directory_choose_button_clicked(self):
         """
         Shows a dialog to select the working directory.
@@ -182,10 +221,11 @@ class CommandDialog(QDialog):
         self.seconds_between_executions_spin_box.hide()
         self.cron_expr_label.hide()
         self.cron_expr_text_box.hide()
-        if ConfigCommandRunMode[self.run_mode_combo_box.currentData()] == ConfigCommandRunMode.PERIOD:
+        run_mode = ConfigCommandRunMode[self.run_mode_combo_box.currentData()]
+        if run_mode == ConfigCommandRunMode.PERIOD:
             self.seconds_between_executions_label.show()
             self.seconds_between_executions_spin_box.show()
-        elif ConfigCommandRunMode[self.run_mode_combo_box.currentData()] == ConfigCommandRunMode.CRON:
+        elif run_mode == ConfigCommandRunMode.CRON:
             self.cron_expr_label.show()
             self.cron_expr_text_box.show()
 
@@ -223,17 +263,16 @@ class CommandDialog(QDialog):
         if self.is_new:
             id_val = self.id_text_box.text()
             if id_val:
-                if slugify(id_val) != id_val:
+                if not COMMAND_ID_REGEX.match(id_val):
                     QMessageBox.warning(self, gettext("Validation error"), gettext("The ID is not valid (can only contain lowercase numbers and letters, and hyphens)."))
                     self.tabs.setCurrentIndex(0)
                     self.id_text_box.setFocus()
                     return
-                for command in self.app.config.commands:
-                    if slugify(command.id) == slugify(id_val):
-                        QMessageBox.warning(self, gettext("Validation error"), gettext("There is another command with the same ID."))
-                        self.tabs.setCurrentIndex(0)
-                        self.id_text_box.setFocus()
-                        return
+                if self.app.config.get_command_by_slug(id_val):
+                    QMessageBox.warning(self, gettext("Validation error"), gettext("There is another command with the same ID."))
+                    self.tabs.setCurrentIndex(0)
+                    self.id_text_box.setFocus()
+                    return
                 new_id_val = id_val
             else:
                 new_id_val = str(uuid.uuid4())
@@ -247,13 +286,11 @@ class CommandDialog(QDialog):
 
         # Check if the name it is not already being used
         new_name = self.name_text_box.text()
-        for loop_command in self.app.config.commands:
-            if loop_command != self.command:
-                if loop_command.name.lower() == new_name.lower():
-                    QMessageBox.warning(self, gettext("Validation error"), gettext("There is another command with the same name."))
-                    self.tabs.setCurrentIndex(0)
-                    self.name_text_box.setFocus()
-                    return
+        if any(other is not self.command for other in self.app.config.get_commands_by_name_ignore_case(new_name)):
+            QMessageBox.warning(self, gettext("Validation error"), gettext("There is another command with the same name."))
+            self.tabs.setCurrentIndex(0)
+            self.name_text_box.setFocus()
+            return
 
         command = self.command_text_box.text()
         script = self.script_text_box.toPlainText()
@@ -286,17 +323,17 @@ class CommandDialog(QDialog):
                 self.tabs.setCurrentIndex(0)
                 self.cron_expr_text_box.setFocus()
                 return
-            if not croniter.is_valid(cron_expr):
+            if not CRON_EXPR_CHARS_REGEX.match(cron_expr) or not croniter.is_valid(cron_expr):
                 QMessageBox.warning(self, gettext("Validation error"), gettext("The cron expression is not valid."))
                 self.tabs.setCurrentIndex(0)
                 self.cron_expr_text_box.setFocus()
                 return
 
         # Configure environment variables
+        model = self.environment_table_model
+        rows = [(model.item(row, 0).text(), model.item(row, 1).text()) for row in range(model.rowCount())]
         new_environment = []
-        for index in range(self.environment_table_model.rowCount()):
-            key = self.environment_table_model.item(index, 0).text()
-            value = self.environment_table_model.item(index, 1).text()
+        for index, (key, value) in enumerate(rows):
             if key or value:
                 if not key and value:
                     QMessageBox.warning(self, gettext("Validation error"), gettext("The key for the environment variable with ID {idx} is empty.").format(idx=index + 1))
@@ -307,7 +344,7 @@ class CommandDialog(QDialog):
         if self.is_new:
             self.command.id = new_id_val
         self.command.name = new_name
-        self.command.description = self.description_text_box.toPlainText().strip() if self.description_text_box.toPlainText().strip() else None
+        self.command.description = self.description_text_box.toPlainText().strip() or None
         if command:
             self.command.command = command
         if script:
@@ -324,12 +361,8 @@ class CommandDialog(QDialog):
         self.command.cron_expr = cron_expr
         self.command.next_run_dt = self.command.get_next_execution_dt()
 
-        self.command.run_in_shell = checkbox_tristate_to_val(self.run_in_shell_checkbox.checkState())
-        self.command.restart_on_exit = checkbox_tristate_to_val(self.restart_on_exit_checkbox.checkState())
-        self.command.restart_on_failure = checkbox_tristate_to_val(self.restart_on_failure_checkbox.checkState())
-        self.command.include_output_in_notifications = checkbox_tristate_to_val(self.include_output_in_notifications_checkbox.checkState())
-        self.command.show_complete_notifications = checkbox_tristate_to_val(self.show_complete_notifications_checkbox.checkState())
-        self.command.show_error_notifications = checkbox_tristate_to_val(self.show_error_notifications_checkbox.checkState())
+        for field_name, checkbox_name in TRISTATE_FIELDS:
+            setattr(self.command, field_name, checkbox_tristate_to_val(getattr(self, checkbox_name).checkState()))
 
         self.command.environment = new_environment
 
@@ -16,3 +16,6 @@ COMMAND_ERROR_ICON_PATH = os.path.join(MODULE_DIR, "icons", "ikonate", "cancel.s
 SETTINGS_ICON_PATH = os.path.join(MODULE_DIR, "icons", "ikonate", "settings.svg")
 ABOUT_ICON_PATH = os.path.join(MODULE_DIR, "icons", "ikonate", "qr.svg")
 EXIT_ICON_PATH = os.path.join(MODULE_DIR, "icons", "ikonate", "exit.svg")
+
+COMMAND_DIALOG_UI_PATH = os.path.join(MODULE_DIR, "command_dialog.ui")
+SETTINGS_DIALOG_UI_PATH = os.path.join(MODULE_DIR, "settings_dialog.ui")
@@ -6,22 +6,21 @@ import os
 from gettext import gettext
 from typing import TYPE_CHECKING, Optional
 
-import click
-from babel.numbers import format_decimal
-from PySide6.QtGui import QIcon, QScreen
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QScreen, QShowEvent
 from PySide6.QtWidgets import QApplication, QCheckBox, QComboBox, QDialog, QLabel, QListWidget, QListWidgetItem, QMessageBox, QPushButton, QWidget
 
 import tray_runner
-from tray_runner.common_utils.common import get_simple_default_locale, remove_app_menu_shortcut
-from tray_runner.common_utils.qt import load_ui, set_warning_style
+from tray_runner.common_utils.common import get_default_babel_locale
+from tray_runner.common_utils.qt import get_icon, launch_in_background, load_ui, set_warning_style
 from tray_runner.config import ConfigCommand, LogLevelEnum
 from tray_runner.constants import APP_NAME
-from tray_runner.gui.command_dialog import CommandDialog
-from tray_runner.gui.constants import REGULAR_ICON_PATH
-from tray_runner.utils import create_tray_runner_app_menu_launcher, create_tray_runner_autostart_shortcut
+from tray_runner.gui.constants import REGULAR_ICON_PATH, SETTINGS_DIALOG_UI_PATH
+from tray_runner.utils import create_tray_runner_app_menu_launcher, create_tray_runner_autostart_shortcut, remove_tray_runner_app_menu_launcher, remove_tray_runner_autostart_shortcut
 
 if TYPE_CHECKING:
     from tray_runner.gui import TrayCmdRunnerApp
+    from tray_runner.gui.command_dialog import CommandDialog
 
 
 class SettingsDialog(QDialog):
@@ -58,8 +57,8 @@ class SettingsDialog(QDialog):
         """
         QDialog.__init__(self, parent)
         self.app = app
-        load_ui(os.path.join(os.path.dirname(__file__), "settings_dialog.ui"), self)
-        self.setWindowIcon(QIcon(REGULAR_ICON_PATH))
+        load_ui(SETTINGS_DIALOG_UI_PATH, self)
+        self.setWindowIcon(get_icon(REGULAR_ICON_PATH))
         self.setWindowTitle(gettext("{app_name} - Configuration").format(app_name=APP_NAME))
         if self.parentWidget().isVisible():
             # Center relative to parent
@@ -111,7 +110,6 @@ class SettingsDialog(QDialog):
 
         self.commands_list.currentItemChanged.connect(self.commands_list_item_changed)
         self.commands_list.itemDoubleClicked.connect(self.commands_list_item_double_clicked)
-        self.update_commands_list()
 
         self.add_command_button.clicked.connect(self.add_command_button_clicked)
         self.edit_command_button.clicked.connect(self.edit_command_button_clicked)
@@ -124,20 +122,54 @@ class SettingsDialog(QDialog):
         self.run_now_button.setEnabled(False)
         self.delete_command_button.setEnabled(False)
 
-        self.app_runs_label.setText(format_decimal(self.app.config.app_runs, locale=get_simple_default_locale()))
+        # The commands list and the statistics are filled when the dialog is shown for the first time
+        self._populated = False
+        # The command dialog is created the first time it is needed, and then reused to add or edit other commands
+        self._command_dialog: Optional["CommandDialog"] = None
+
+    def showEvent(self, event: QShowEvent):  # pylint: disable=invalid-name
+        """
+        Fills the commands list and the statistics the first time the dialog is shown.
+        """
+        if not self._populated:
+            self._populated = True
+            self.update_commands_list()
+
+            # Babel is only needed by the dialogs, so it is not loaded at startup
+            from babel.numbers import format_decimal  # pylint: disable=import-outside-toplevel
+
+            self.app_runs_label.setText(format_decimal(self.app.config.app_runs, locale=get_default_babel_locale()))
+        QDialog.showEvent(self, event)
+
+    def get_command_dialog(self, command: ConfigCommand, is_new: bool = False) -> "CommandDialog":
+        """
+        Returns the command dialog filled with the command data, creating it only the first time.
+        """
+        if self._command_dialog is None:
+            from tray_runner.gui.command_dialog import CommandDialog  # pylint: disable=import-outside-toplevel
+
+            self._command_dialog = CommandDialog(self, self.app, command, is_new)
+        else:
+            self._command_dialog.set_command(command, is_new)
+        return self._command_dialog
 
     def update_commands_list(self):
         """
         Function that clears and re-inserts the elements in the list.
         """
+        # Avoid calling the selection handler for every removed and inserted item
+        self.commands_list.blockSignals(True)
         self.commands_list.clear()
-        for command in sorted(self.app.config.commands, key=lambda x: x.name.lower()):
+        for command in self.app.config.get_sorted_commands():
             item = QListWidgetItem(command.name)
+            item.setData(Qt.ItemDataRole.UserRole, command)
             font = item.font()
             if not command.disabled:
                 font.setBold(True)
                 item.setFont(font)
             self.commands_list.addItem(item)
+        self.commands_list.blockSignals(False)
+        self.commands_list_item_changed(self.commands_list.currentItem(), None)
 
     def log_level_combo_box_changed(self):
         """
@@ -154,9 +186,9 @@ class SettingsDialog(QDialog):
         self.app.config.create_app_menu_shortcut = self.create_app_menu_shortcut_checkbox.isChecked()
         self.app.save_config()
         if self.app.config.create_app_menu_shortcut:
-            create_tray_runner_app_menu_launcher()
+            create_tray_runner_app_menu_launcher(force=True)
         else:
-            remove_app_menu_shortcut(APP_NAME)
+            remove_tray_runner_app_menu_launcher()
 
     def auto_start_checkbox_changed(self):
         """
@@ -165,9 +197,9 @@ class SettingsDialog(QDialog):
         self.app.config.auto_start = self.auto_start_checkbox.isChecked()
         self.app.save_config()
         if self.app.config.auto_start:
-            create_tray_runner_autostart_shortcut()
+            create_tray_runner_autostart_shortcut(force=True)
         else:
-            remove_app_menu_shortcut(APP_NAME, autostart=True)
+            remove_tray_runner_autostart_shortcut()
 
     def include_output_in_notifications_checkbox_changed(self):
         """
@@ -175,6 +207,7 @@ class SettingsDialog(QDialog):
         """
         self.app.config.include_output_in_notifications = self.include_output_in_notifications_checkbox.isChecked()
         self.app.save_config()
+        self.app.invalidate_command_settings()
 
     def show_complete_notifications_checkbox_changed(self):
         """
@@ -182,6 +215,7 @@ class SettingsDialog(QDialog):
         """
         self.app.config.show_complete_notifications = self.show_complete_notifications_checkbox.isChecked()
         self.app.save_config()
+        self.app.invalidate_command_settings()
 
     def show_error_notifications_checkbox_changed(self):
         """
@@ -189,6 +223,7 @@ class SettingsDialog(QDialog):
         """
         self.app.config.show_error_notifications = self.show_error_notifications_checkbox.isChecked()
         self.app.save_config()
+        self.app.invalidate_command_settings()
 
     def run_in_shell_checkbox_changed(self):
         """
@@ -196,6 +231,7 @@ class SettingsDialog(QDialog):
         """
         self.app.config.run_in_shell = self.run_in_shell_checkbox.isChecked()
         self.app.save_config()
+        self.app.invalidate_command_settings()
 
     def restart_on_exit_checkbox_changed(self):
         """
@@ -203,6 +239,7 @@ class SettingsDialog(QDialog):
         """
         self.app.config.restart_on_exit = self.restart_on_exit_checkbox.isChecked()
         self.app.save_config()
+        self.app.invalidate_command_settings()
 
     def restart_on_failure_checkbox_changed(self):
         """
@@ -210,6 +247,7 @@ class SettingsDialog(QDialog):
         """
         self.app.config.restart_on_failure = self.restart_on_failure_checkbox.isChecked()
         self.app.save_config()
+        self.app.invalidate_command_settings()
 
     def commands_list_item_changed(self, current: QListWidgetItem, _previous: QListWidgetItem):
         """
@@ -219,11 +257,8 @@ class SettingsDialog(QDialog):
         self.show_command_logs_button.setEnabled(bool(current))
         self.delete_command_button.setEnabled(bool(current))
         if current:
-            command = self.app.config.get_command_by_name(current.text())
-            if command:
-                self.run_now_button.setEnabled(not command.disabled)
-            else:
-                self.run_now_button.setEnabled(False)
+            command: ConfigCommand = current.data(Qt.ItemDataRole.UserRole)
+            self.run_now_button.setEnabled(not command.disabled)
         else:
             self.delete_command_button.setEnabled(False)
 
@@ -232,10 +267,12 @@ class SettingsDialog(QDialog):
         Function called when an item in the command list is double-clicked, to edit it.
         """
         idx = self.commands_list.indexFromItem(item).row()
-        command = self.app.config.get_command_by_name(item.text())
+        command: Optional[ConfigCommand] = item.data(Qt.ItemDataRole.UserRole)
         if command:
-            command_dialog = CommandDialog(self, self.app, command)
+            command_dialog = self.get_command_dialog(command)
             if command_dialog.exec():
+                # The id and the name may have been changed
+                self.app.config.rebuild_index()
                 # Start the process
                 if command.disabled:
                     self.app.stop_command_thread(command)
@@ -249,29 +286,28 @@ class SettingsDialog(QDialog):
                 self.commands_list.setCurrentRow(idx)
                 # Update the application menu and status
                 self.app.update_status()
-            command_dialog.destroy()
 
     def add_command_button_clicked(self):
         """
         Function called when the add button is clicked.
         """
         command = ConfigCommand(id="", name="", command="")
-        command_dialog = CommandDialog(self, self.app, command, True)
+        command_dialog = self.get_command_dialog(command, True)
         if command_dialog.exec():
             # Start the process
             if not command.disabled:
                 self.app.start_command_thread(command)
             # Add the new command to the configuration commands list
             self.app.config.commands.append(command)
+            self.app.config.rebuild_index()
             # Save the configuration
             self.app.save_config()
             # Update the list of commands in UI
             self.update_commands_list()
             # Restore the selected index
-            self.commands_list.setCurrentRow(list(sorted(self.app.config.commands, key=lambda x: x.name.lower())).index(command))
+            self.commands_list.setCurrentRow(self.app.config.get_sorted_commands().index(command))
             # Update the application menu and status
             self.app.update_status()
-        command_dialog.destroy()
 
     def edit_command_button_clicked(self):
         """
@@ -287,12 +323,12 @@ class SettingsDialog(QDialog):
         """
         selected_items = self.commands_list.selectedItems()
         if selected_items:
-            command = self.app.config.get_command_by_name(selected_items[0].text())
+            command: ConfigCommand = selected_items[0].data(Qt.ItemDataRole.UserRole)
             log_path = command.get_log_file_path()
             if not os.path.exists(log_path):
                 QMessageBox.warning(self, gettext("No logs available"), gettext("This command doesn't have generated logs yet."))
             else:
-                click.launch(log_path)
+                launch_in_background(log_path)
 
     def run_now_button_clicked(self):
         """
@@ -300,7 +336,7 @@ class SettingsDialog(QDialog):
         """
         selected_items = self.commands_list.selectedItems()
         if selected_items:
-            command = self.app.config.get_command_by_name(selected_items[0].text())
+            command: ConfigCommand = selected_items[0].data(Qt.ItemDataRole.UserRole)
             if not command.disabled:
                 self.app.force_command_thread_run_now(command)
 
@@ -312,7 +348,7 @@ class SettingsDialog(QDialog):
         selected_items = self.commands_list.selectedItems()
         if selected_items:
 
-            command = self.app.config.get_command_by_name(selected_items[0].text())
+            command: ConfigCommand = selected_items[0].data(Qt.ItemDataRole.UserRole)
             if QMessageBox.question(self, gettext("Delete command"), gettext('Are you sure that you want to delete the command "{command_name}"?').format(command_name=command.name)):
 
                 # pylint: disable=pointless-string-statement
@@ -345,6 +381,7 @@ class SettingsDialog(QDialog):
                 self.app.stop_command_thread(command)
                 # Remove command from configuration
                 self.app.config.commands.remove(command)
+                self.app.config.rebuild_index()
                 # Save configuration
                 self.app.save_config()
                 # Update commands list
@@ -1,64 +1,136 @@
 """
 tray_runner.tray_runner_utils module.
 """
+import contextlib
+import filecmp
 import logging
 import os
 import shutil
 import sys
-from typing import Optional, Tuple, Union
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional, Tuple, Union
 
 import tray_runner
-from tray_runner.common_utils.common import create_app_menu_shortcut
+from tray_runner.common_utils.common import create_app_menu_shortcut, get_app_menu_shortcut_path, remove_app_menu_shortcut
 from tray_runner.constants import APP_NAME
 from tray_runner.gui.constants import ICON_PATH, ICON_PATH_ICO
 
+LOG = logging.getLogger(__name__)
 
-def resolve_app_exe_info() -> Tuple[str, Optional[str], Optional[str], Union[Optional[str], Tuple[str, int]]]:
+# Files that record the parameters of the shortcuts created by a previous run, so the shortcuts are only written again when they change
+APP_MENU_SHORTCUT_STAMP_PATH = os.path.join(tray_runner.APP_DIR, "app-menu-shortcut.stamp")
+AUTOSTART_SHORTCUT_STAMP_PATH = os.path.join(tray_runner.APP_DIR, "autostart-shortcut.stamp")
+
+
+def resolve_frozen_app_exe_info() -> Tuple[str, Optional[str], Optional[str], Union[Optional[str], Tuple[str, int]]]:
     """
-    Auxiliary function to guess the executable name, arguments, working dir and icon for the current execution method.
+    Auxiliary function to get the executable name, arguments, working dir and icon when running using Pyinstaller.
     """
     icon: Union[Optional[str], Tuple[str, int]] = None
-    if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
-        exe = os.path.abspath(sys.argv[0])
-        args = None
-        work_dir = os.path.expanduser("~")
-        if sys.platform == "win32":
-            icon = (exe, 0)
-        else:
-            # Copy icon to app dir
-            icon = os.path.join(tray_runner.APP_DIR, "icon.png")
-            if not os.path.exists(tray_runner.APP_DIR):
-                os.makedirs(tray_runner.APP_DIR)
+    exe = os.path.abspath(sys.argv[0])
+    args = None
+    work_dir = tray_runner.HOME_DIR
+    if sys.platform == "win32":
+        icon = (exe, 0)
+    else:
+        # Copy icon to app dir, unless a previous run already copied the same file; the content is compared
+        # because the one-file builds extract the bundled icon again, with a new modification time, on each launch
+        icon = os.path.join(tray_runner.APP_DIR, "icon.png")
+        os.makedirs(tray_runner.APP_DIR, exist_ok=True)
+        if not os.path.exists(icon) or not filecmp.cmp(ICON_PATH, icon):
             shutil.copyfile(ICON_PATH, icon)
+    return exe, args, work_dir, icon
+
+
+def resolve_python_app_exe_info() -> Tuple[str, Optional[str], Optional[str], Union[Optional[str], Tuple[str, int]]]:
+    """
+    Auxiliary function to get the executable name, arguments, working dir and icon when running the package with the Python interpreter.
+    """
+    icon: Union[Optional[str], Tuple[str, int]] = None
+    exe = sys.executable
+    exe_dir = os.path.dirname(os.path.abspath(exe))
+    if sys.platform == "win32":
+        if os.path.exists(os.path.join(exe_dir, "pythonw.exe")):
+            exe = os.path.join(exe_dir, "pythonw.exe")
+    args = "-m tray_runner.gui"
+    # Parent of the package directory, without resolving symbolic links
+    work_dir = os.path.dirname(os.path.abspath(tray_runner.PACKAGE_DIR))
+    if sys.platform == "win32":
+        icon = ICON_PATH_ICO
     else:
-        exe = sys.executable
-        exe_dir = os.path.dirname(os.path.abspath(exe))
-        if sys.platform == "win32":
-            if os.path.exists(os.path.join(exe_dir, "pythonw.exe")):
-                exe = os.path.join(exe_dir, "pythonw.exe")
-        args = "-m tray_runner.gui"
-        work_dir = os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(tray_runner.__file__)), ".."))
-        if sys.platform == "win32":
-            icon = ICON_PATH_ICO
-        else:
-            icon = ICON_PATH
+        icon = ICON_PATH
     return exe, args, work_dir, icon
 
 
-def create_tray_runner_app_menu_launcher():
+# Guesses the executable name, arguments, working dir and icon for the current execution method; the execution method doesn't change while
+# the process is running, so the function is chosen once and its result is computed only once
+resolve_app_exe_info = lru_cache(maxsize=1)(resolve_frozen_app_exe_info if tray_runner.IS_FROZEN else resolve_python_app_exe_info)
+
+
+def create_tray_runner_shortcut(stamp_path: str, autostart: bool = False, force: bool = False) -> None:
     """
-    Auxiliary function to create the app menu launcher shortcut.
+    Auxiliary function to create the app menu or auto-start shortcut, unless a previous run already created it with the same parameters.
     """
     exe, args, work_dir, icon = resolve_app_exe_info()
-    create_app_menu_shortcut(APP_NAME, command=exe, args=args, work_dir=work_dir, icon=icon)
+    stamp = repr((tray_runner.__version__, exe, args, work_dir, icon))
+    if not force:
+        # The stamp is only trusted while the shortcut exists, as it may have been removed by the user or the desktop environment
+        try:
+            shortcut_path = get_app_menu_shortcut_path(APP_NAME, autostart)
+            if shortcut_path and os.path.exists(shortcut_path):
+                with open(stamp_path, encoding="utf-8") as stamp_file:
+                    if stamp_file.read() == stamp:
+                        LOG.debug("Shortcut already created with the same parameters (autostart=%s).", autostart)
+                        return
+        except Exception:  # pylint: disable=broad-except
+            pass
+    if create_app_menu_shortcut(APP_NAME, command=exe, args=args, work_dir=work_dir, icon=icon, autostart=autostart):
+        try:
+            os.makedirs(os.path.dirname(stamp_path), exist_ok=True)
+            with open(stamp_path, "w", encoding="utf-8") as stamp_file:
+                stamp_file.write(stamp)
+        except OSError as ex:
+            LOG.warning("Error saving the shortcut stamp %s: %s", stamp_path, ex)
+
+
+def remove_tray_runner_shortcut(stamp_path: str, autostart: bool = False) -> None:
+    """
+    Auxiliary function to remove the app menu or auto-start shortcut, and the stamp of its creation.
+    """
+    remove_app_menu_shortcut(APP_NAME, autostart=autostart)
+    try:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(stamp_path)
+    except OSError as ex:
+        LOG.warning("Error removing the shortcut stamp %s: %s", stamp_path, ex)
+
+
+def create_tray_runner_app_menu_launcher(force: bool = False):
+    """
+    Auxiliary function to create the app menu launcher shortcut.
+    """
+    create_tray_runner_shortcut(APP_MENU_SHORTCUT_STAMP_PATH, force=force)
 
 
-def create_tray_runner_autostart_shortcut():
+def remove_tray_runner_app_menu_launcher():
+    """
+    Auxiliary function to remove the app menu launcher shortcut.
+    """
+    remove_tray_runner_shortcut(APP_MENU_SHORTCUT_STAMP_PATH)
+
+
+def create_tray_runner_autostart_shortcut(force: bool = False):
     """
     Auxiliary function to create the auto-start shortcut.
     """
-    exe, args, work_dir, icon = resolve_app_exe_info()
-    create_app_menu_shortcut(APP_NAME, command=exe, args=args, work_dir=work_dir, icon=icon, autostart=True)
+    create_tray_runner_shortcut(AUTOSTART_SHORTCUT_STAMP_PATH, autostart=True, force=force)
+
+
+def remove_tray_runner_autostart_shortcut():
+    """
+    Auxiliary function to remove the auto-start shortcut.
+    """
+    remove_tray_runner_shortcut(AUTOSTART_SHORTCUT_STAMP_PATH, autostart=True)
 
 
 class PackagePathFilter(logging.Filter):  # pylint: disable=too-few-public-methods
@@ -68,14 +140,50 @@ class PackagePathFilter(logging.Filter):  # pylint: disable=too-few-public-metho
     Borrowed from: https://stackoverflow.com/a/52582536/576138
     """
 
-    def filter(self, record):
-        pathname = record.pathname
-        record.relativepath = None
-        abs_sys_paths = map(os.path.abspath, sys.path)
-        for path in sorted(abs_sys_paths, key=len, reverse=True):  # longer paths first
-            if not path.endswith(os.sep):
-                path += os.sep
-            if pathname.startswith(path):
-                record.relativepath = os.path.relpath(pathname, path)
+    def __init__(self, name: str = ""):
+        """
+        PackagePathFilter constructor.
+        """
+        super().__init__(name)
+        self._sys_path: Tuple[str, ...] = ()
+        self._prefixes: FrozenSet[str] = frozenset()
+        # Relative path of each file that has logged something, valid while sys.path doesn't change
+        self._relative_paths: Dict[str, Optional[str]] = {}
+
+    def get_prefixes(self) -> FrozenSet[str]:
+        """
+        Returns the set of absolute sys.path entries; it is only computed again when sys.path changes.
+        """
+        sys_path = tuple(sys.path)
+        if sys_path != self._sys_path:
+            self._prefixes = frozenset(os.path.abspath(path) for path in sys_path)
+            self._relative_paths = {}
+            self._sys_path = sys_path
+        return self._prefixes
+
+    def get_relative_path(self, pathname: str) -> Optional[str]:
+        """
+        Returns the path relative to the longest sys.path entry that contains it, looking up its parent directories from the deepest one.
+        """
+        prefixes = self.get_prefixes()
+        if pathname in self._relative_paths:
+            return self._relative_paths[pathname]
+        relative_path = None
+        directory = os.path.dirname(pathname)
+        while True:
+            if directory in prefixes:
+                relative_path = pathname[len(directory) :].lstrip(os.sep)
+                break
+            parent = os.path.dirname(directory)
+            if parent == directory:
                 break
+            directory = parent
+        self._relative_paths[pathname] = relative_path
+        return relative_path
+
+    def filter(self, record):
+        # The record is handled by several handlers; compute the path only for the first one
+        if "relativepath" in record.__dict__:
+            return True
+        record.relativepath = self.get_relative_path(record.pathname)
         return True